@@ -0,0 +1,112 @@
+"""
+Reminder and condition ingest on SQLite: one POST per record vs the bulk endpoints.
+
+Imports the same generated patient records three ways (single-record endpoints,
+a bulk JSON body, a bulk NDJSON body) into fresh databases, then measures the
+peak Python allocations of one large bulk request for JSON vs NDJSON bodies.
+
+    cd backend && python -m benchmarks.bulk_ingest --records 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.common import report
+from benchmarks.reminder_listing import create_app
+from extensions import db
+
+
+def records(n, rng):
+    today = date.today()
+    for i in range(n):
+        start = today - timedelta(days=rng.randrange(365))
+        yield 'reminder', {
+            'user_id': rng.randrange(1, 200), 'medication': f"Medication {i % 300}", 'dosage': '500mg',
+            'frequency': 'twice daily', 'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=rng.randrange(7, 400))).isoformat(), 'times': ['08:00', '20:00'],
+        }
+        if i % 5 == 0:
+            yield 'chronic', {'user_id': rng.randrange(1, 200), 'condition': f"Condition {i % 40}", 'notes': 'imported'}
+
+
+def fresh_client():
+    app = create_app(os.path.join(tempfile.mkdtemp(), 'ingest.sqlite3'))
+    context = app.app_context()
+    context.push()
+    db.create_all()
+    return app.test_client(), context
+
+
+def ingest_single(client, data):
+    for kind, item in data:
+        client.post('/api/reminders' if kind == 'reminder' else '/api/chronic', json=item)
+
+
+def ingest_bulk(client, data, ndjson):
+    for kind in ('reminder', 'chronic'):
+        items = [item for k, item in data if k == kind]
+        url = '/api/reminders/bulk' if kind == 'reminder' else '/api/chronic/bulk'
+        if ndjson:
+            body = ''.join(json.dumps(item) + '\n' for item in items)
+            client.post(url, data=body, content_type='application/x-ndjson').get_data()
+        else:
+            client.post(url, json={'items': items}).get_data()
+
+
+def throughput(fn, data):
+    client, context = fresh_client()
+    try:
+        start = time.perf_counter()
+        fn(client, data)
+        elapsed = time.perf_counter() - start
+    finally:
+        context.pop()
+    return {'records': len(data), 'elapsed_s': round(elapsed, 3), 'records_per_s': round(len(data) / elapsed, 1)}
+
+
+def peak_allocations(data, ndjson):
+    client, context = fresh_client()
+    items = [item for kind, item in data if kind == 'reminder']
+    if ndjson:
+        kwargs = {'data': ''.join(json.dumps(item) + '\n' for item in items).encode(), 'content_type': 'application/x-ndjson'}
+    else:
+        kwargs = {'data': json.dumps({'items': items}).encode(), 'content_type': 'application/json'}
+    try:
+        tracemalloc.start()
+        response = client.post('/api/reminders/bulk', **kwargs)
+        # NDJSON results are streamed; drain them line by line like a client would
+        for _ in response.response:
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        context.pop()
+    return round(peak / 1024 / 1024, 1)
+
+
+def run(records_count=5000, memory_records=50_000, seed=17):
+    data = list(records(records_count, random.Random(seed)))
+    memory_data = list(records(memory_records, random.Random(seed)))
+    return {
+        'single_requests': throughput(ingest_single, data),
+        'bulk_json': throughput(lambda client, d: ingest_bulk(client, d, ndjson=False), data),
+        'bulk_ndjson': throughput(lambda client, d: ingest_bulk(client, d, ndjson=True), data),
+        'peak_alloc_mb': {
+            'reminders': sum(1 for kind, _ in memory_data if kind == 'reminder'),
+            'json_body': peak_allocations(memory_data, ndjson=False),
+            'ndjson_body': peak_allocations(memory_data, ndjson=True),
+        },
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--memory-records', type=int, default=50_000)
+    args = parser.parse_args()
+    report('bulk_ingest', run(records_count=args.records, memory_records=args.memory_records))
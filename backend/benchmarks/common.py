@@ -0,0 +1,36 @@
+import json
+import math
+import time
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize(samples_ms, elapsed_s=None):
+    """Summary of latency samples (in milliseconds) as a JSON-friendly dict."""
+    summary = {
+        'count': len(samples_ms),
+        'p50_ms': round(percentile(samples_ms, 50), 4),
+        'p95_ms': round(percentile(samples_ms, 95), 4),
+        'p99_ms': round(percentile(samples_ms, 99), 4),
+        'max_ms': round(max(samples_ms), 4) if samples_ms else 0.0,
+    }
+    if elapsed_s:
+        summary['throughput_per_s'] = round(len(samples_ms) / elapsed_s, 2)
+    return summary
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed milliseconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def report(name, results):
+    print(json.dumps({'benchmark': name, 'results': results}, indent=2, ensure_ascii=False))
@@ -0,0 +1,95 @@
+"""
+Diagnosis under a traffic spike: blocking requests vs the job queue.
+
+Fires a burst of triage requests (a few of them urgent) at the fake OpenAI
+server. The blocking mode runs diagnose() on a fixed number of request threads,
+like Flask workers tied up for the whole call; the job mode enqueues every
+request and lets the worker pool drain the queue, urgent jobs first.
+
+    cd backend && python -m benchmarks.diagnosis_jobs --requests 200
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from benchmarks.common import report, summarize
+from benchmarks.fake_openai import FakeOpenAIServer
+from services.diagnosis import diagnose
+from services.jobs import DiagnosisWorkers, JobQueue, QueueFull
+from services.llm import gateway
+from services.response_cache import response_cache
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'triage_responses.json')
+
+
+def workload(requests, urgent_share, rng):
+    return [
+        ('I have sudden chest pain' if rng.random() < urgent_share else 'Mild cough and runny nose') + f" #{i}"
+        for i in range(requests)
+    ]
+
+
+def run_blocking(symptoms, request_threads):
+    start = time.perf_counter()
+
+    def call(text):
+        diagnose(text)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(request_threads) as pool:
+        samples = list(pool.map(call, symptoms))
+    return dict(summarize(samples), note='ms from the start of the burst until each response')
+
+
+def run_jobs(symptoms, workers, max_depth):
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3'), max_depth=max_depth)
+    pool = DiagnosisWorkers(queue, workers=workers, idle_poll=0.05)
+    app = Flask(__name__)
+    submit_ms, job_ids, rejected = [], [], 0
+    for text in symptoms:
+        started = time.perf_counter()
+        try:
+            job_ids.append(pool.submit(app, text))
+        except QueueFull:
+            rejected += 1
+        submit_ms.append((time.perf_counter() - started) * 1000)
+    while queue.depth():
+        time.sleep(0.05)
+    done = {'normal': [], 'urgent': []}
+    for job_id, priority in job_ids:
+        job = queue.get(job_id)
+        done[priority].append((job['finished_at'] - job['created_at']) * 1000)
+    return {
+        'submit': summarize(submit_ms),
+        'rejected': rejected,
+        'normal_completion': summarize(done['normal']),
+        'urgent_completion': summarize(done['urgent']),
+    }
+
+
+def run(requests=200, urgent_share=0.05, request_threads=8, workers=8, max_depth=1000, latency_ms=800, seed=29):
+    with open(CORPUS, encoding='utf-8') as f:
+        replies = [item['completion'] for item in json.load(f)]
+    server = FakeOpenAIServer(latency_ms=latency_ms, replies=replies).start()
+    gateway.api_key, gateway.base_url = 'fake', server.base_url
+    symptoms = workload(requests, urgent_share, random.Random(seed))
+    try:
+        blocking = run_blocking(symptoms, request_threads)
+        response_cache.backend.clear()
+        return {'requests': requests, 'blocking_requests': blocking, 'job_queue': run_jobs(symptoms, workers, max_depth)}
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    report('diagnosis_jobs', run(requests=args.requests, request_threads=args.workers, workers=args.workers))
@@ -0,0 +1,134 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Replies with canned completions after a configurable delay (streamed word by
+word when the request asks for it) and can inject 429s, so the LLM layer can
+be exercised without the real API:
+
+    cd backend && python -m benchmarks.fake_openai --port 8765 --latency-ms 400
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake flask run
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "This is a canned reply from the fake OpenAI server."
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=200, error_rate=0.0, replies=None, seed=0,
+                 token_interval_ms=10):
+        super().__init__((host, port), _Handler)
+        self.latency_ms = latency_ms
+        self.token_interval_ms = token_interval_ms
+        self.error_rate = error_rate
+        self._replies = itertools.cycle(replies or [DEFAULT_REPLY])
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_reply(self):
+        with self._lock:
+            self.request_count += 1
+            fail = self._rng.random() < self.error_rate
+            return fail, next(self._replies)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40 ms per reply
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, model, reply, usage=None):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            chunk = {
+                'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word},
+                             'finish_reason': 'stop' if i == len(words) - 1 else None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            time.sleep(self.server.token_interval_ms / 1000)
+        if usage is not None:
+            chunk = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                     'model': model, 'choices': [], 'usage': usage}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        fail, reply = self.server.next_reply()
+        time.sleep(self.server.latency_ms / 1000)
+        if fail:
+            self._send_json(429, {'error': {'message': 'rate limited', 'type': 'rate_limit_error'}},
+                            headers={'retry-after': '0.05'})
+            return
+        # Word counts stand in for tokens
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in request.get('messages', []))
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(reply.split()),
+                 'total_tokens': prompt_tokens + len(reply.split())}
+        if request.get('stream'):
+            include_usage = (request.get('stream_options') or {}).get('include_usage')
+            self._send_stream(request.get('model', 'gpt-4o-mini'), reply, usage if include_usage else None)
+            return
+        self._send_json(200, {
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-4o-mini'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': reply}}],
+            'usage': usage,
+        })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,135 @@
+"""
+Local stand-in for a Redis server, limited to what the Socket.IO message queue uses.
+
+Speaks enough RESP2/RESP3 for redis-py pub/sub (HELLO, PING, SUBSCRIBE, UNSUBSCRIBE,
+PUBLISH, plus OK replies to connection setup commands), so several backend processes can
+share rooms without installing Redis:
+
+    cd backend && python -m benchmarks.fake_redis --port 6390
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6390/0 gunicorn --worker-class gevent -w 1 -b :5001 wsgi:app
+"""
+import argparse
+import threading
+from collections import defaultdict
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+
+OK_COMMANDS = {b'CLIENT', b'SELECT', b'AUTH', b'READONLY'}
+
+
+def _bulk(value):
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(*items, push=False):
+    # RESP3 delivers pub/sub messages as push frames
+    return (b'>%d\r\n' if push else b'*%d\r\n') % len(items) + b''.join(items)
+
+
+def _hello(protocol):
+    fields = [(b'server', _bulk(b'redis')), (b'version', _bulk(b'7.2.0')), (b'proto', b':%d\r\n' % protocol),
+              (b'id', b':1\r\n'), (b'mode', _bulk(b'standalone')), (b'role', _bulk(b'master')), (b'modules', b'*0\r\n')]
+    if protocol == 3:
+        return b'%%%d\r\n' % len(fields) + b''.join(_bulk(k) + v for k, v in fields)
+    return _array(*(item for k, v in fields for item in (_bulk(k), v)))
+
+
+class FakeRedisServer(ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.channels = defaultdict(set)
+        self.lock = threading.Lock()
+        self.published = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+            self.published += 1
+        for handler in subscribers:
+            handler.send(_array(_bulk(b'message'), _bulk(channel), _bulk(message), push=handler.resp3))
+        return len(subscribers)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.subscriptions = set()
+        self.resp3 = False
+        self.write_lock = threading.Lock()
+
+    def send(self, data):
+        try:
+            with self.write_lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+        except OSError:
+            pass
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        try:
+            while (args := self.read_command()) is not None:
+                if not args:
+                    continue
+                command = args[0].upper()
+                if command == b'HELLO':
+                    protocol = int(args[1]) if len(args) > 1 else 2
+                    self.resp3 = protocol == 3
+                    self.send(_hello(protocol))
+                elif command == b'PING':
+                    self.send(_array(_bulk(b'pong'), _bulk(b''), push=self.resp3) if self.subscriptions else b'+PONG\r\n')
+                elif command in OK_COMMANDS:
+                    self.send(b'+OK\r\n')
+                elif command == b'PUBLISH':
+                    self.send(b':%d\r\n' % server.publish(args[1], args[2]))
+                elif command in (b'SUBSCRIBE', b'UNSUBSCRIBE'):
+                    channels = args[1:] or list(self.subscriptions)
+                    for channel in channels:
+                        with server.lock:
+                            if command == b'SUBSCRIBE':
+                                self.subscriptions.add(channel)
+                                server.channels[channel].add(self)
+                            else:
+                                self.subscriptions.discard(channel)
+                                server.channels[channel].discard(self)
+                        kind = command.lower()
+                        self.send(_array(_bulk(kind), _bulk(channel), b':%d\r\n' % len(self.subscriptions), push=self.resp3))
+                else:
+                    self.send(b"-ERR unknown command '%s'\r\n" % args[0])
+        finally:
+            with server.lock:
+                for channel in self.subscriptions:
+                    server.channels[channel].discard(self)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Fake Redis listening on {server.url}")
+    server.serve_forever()
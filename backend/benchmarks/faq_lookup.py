@@ -0,0 +1,49 @@
+"""
+FAQ lookup latency at 10k and 100k entries.
+
+    cd backend && python -m benchmarks.faq_lookup
+"""
+import random
+import time
+
+from benchmarks.common import report, summarize, timed
+from services.faq_index import FaqIndex
+
+VOCAB = (
+    "fever headache cough cold flu rash pain chest stomach back throat sore runny nose "
+    "diabetes insulin blood pressure sugar asthma inhaler allergy vaccine pregnancy sleep "
+    "water diet exercise vitamin antibiotic dose tablet child elderly infection wound burn "
+    "dizzy nausea vomiting diarrhea fatigue anxiety stress heart kidney liver skin eye ear"
+).split()
+
+
+def synthetic_faq(n, rng):
+    return [
+        {
+            'category': 'Synthetic',
+            'q': f"What should I do about {' '.join(rng.sample(VOCAB, 4))} case {i}?",
+            'a': f"Answer {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def run(sizes=(10_000, 100_000), queries=2_000, seed=7):
+    rng = random.Random(seed)
+    results = {}
+    for size in sizes:
+        entries = synthetic_faq(size, rng)
+        start = time.perf_counter()
+        index = FaqIndex(entries)
+        build_s = time.perf_counter() - start
+        samples = []
+        for _ in range(queries):
+            query = ' '.join(rng.sample(VOCAB, 3))
+            _, ms = timed(index.search, query, top_k=5)
+            samples.append(ms)
+        results[str(size)] = dict(summarize(samples), build_s=round(build_s, 3))
+    return results
+
+
+if __name__ == '__main__':
+    report('faq_lookup', run())
@@ -0,0 +1,68 @@
+"""
+Throughput of the shared LLM gateway under concurrent load, against the fake OpenAI server.
+
+Compares blocking per-thread openai.OpenAI calls (the old per-module clients)
+with the pooled async gateway, plus a burst of identical requests that the
+gateway coalesces.
+
+    cd backend && python -m benchmarks.llm_throughput
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from benchmarks.common import report, summarize
+from benchmarks.fake_openai import FakeOpenAIServer
+from services.llm import LLMGateway
+
+
+def _messages(i):
+    return [{"role": "system", "content": "You are a test."}, {"role": "user", "content": f"question {i}"}]
+
+
+def run_blocking(base_url, requests, workers):
+    client = openai.OpenAI(api_key='fake', base_url=base_url, max_retries=3)
+
+    def call(i):
+        start = time.perf_counter()
+        client.chat.completions.create(model="gpt-4o-mini", messages=_messages(i))
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        samples = list(pool.map(call, range(requests)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def run_gateway(base_url, requests, identical=False):
+    gateway = LLMGateway(api_key='fake', base_url=base_url, max_connections=64, max_concurrency=64)
+    gateway._ensure_started()
+    samples = []
+
+    def submit(i):
+        submitted = time.perf_counter()
+        future = gateway.submit(_messages(0 if identical else i))
+        future.add_done_callback(lambda _: samples.append((time.perf_counter() - submitted) * 1000))
+        return future
+
+    start = time.perf_counter()
+    for future in [submit(i) for i in range(requests)]:
+        future.result()
+    return dict(summarize(samples, time.perf_counter() - start), **gateway.stats)
+
+
+def run(requests=400, workers=8, latency_ms=200, error_rate=0.02):
+    server = FakeOpenAIServer(latency_ms=latency_ms, error_rate=error_rate).start()
+    try:
+        return {
+            'blocking_threads': run_blocking(server.base_url, requests, workers),
+            'gateway': run_gateway(server.base_url, requests),
+            'gateway_identical': run_gateway(server.base_url, requests, identical=True),
+        }
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    report('llm_throughput', run())
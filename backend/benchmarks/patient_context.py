@@ -0,0 +1,103 @@
+"""
+Database queries per chat turn with personalized assistant replies.
+
+Seeds a SQLite database with users, conditions and medications, points the LLM
+gateway at the fake OpenAI server and replays chat turns from a skewed mix of
+users (a few very active ones, a long tail), with an occasional record update
+that invalidates that user's snapshot. Compares building the patient context on
+every turn with the snapshot cache.
+
+    cd backend && python -m benchmarks.patient_context --turns 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from benchmarks.common import report, summarize
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.reminder_listing import create_app
+from extensions import db
+from routes.chat import chat_bp
+from services.llm import gateway
+from services.patient_context import patient_context
+from services.response_cache import response_cache
+
+
+def seed(path, users, rng):
+    today = date.today()
+    conn = sqlite3.connect(path)
+    conn.executemany('INSERT INTO user (id, email, password_hash) VALUES (?, ?, ?)',
+                     ((u, f"user{u}@example.com", 'x') for u in range(1, users + 1)))
+    conn.executemany('INSERT INTO chronic_condition (user_id, condition, notes) VALUES (?, ?, ?)', (
+        (u, rng.choice(('Asthma', 'Hypertension', 'Type 2 diabetes', 'Migraine')), 'stable')
+        for u in range(1, users + 1) for _ in range(rng.randrange(4))
+    ))
+    conn.executemany(
+        'INSERT INTO medication_reminder (user_id, medication, dosage, frequency, start_date, end_date, times) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)', (
+            (u, rng.choice(('Metformin', 'Amlodipine', 'Salbutamol', 'Paracetamol')), '500mg', 'twice daily',
+             (today - timedelta(days=rng.randrange(60))).isoformat(),
+             (today + timedelta(days=rng.randrange(-10, 60))).isoformat(), '["08:00", "20:00"]')
+            for u in range(1, users + 1) for _ in range(rng.randrange(6))
+        ))
+    conn.commit()
+    conn.close()
+
+
+def replay(client, queries, turns, users, write_every, rng):
+    samples, chat_queries = [], 0
+    for turn in range(turns):
+        # Pareto-distributed user ids: most turns come from a small set of active users
+        user_id = min(users, int(rng.paretovariate(1.2)))
+        if write_every and turn % write_every == write_every - 1:
+            client.post('/api/chronic', json={'user_id': user_id, 'condition': 'Allergic rhinitis'})
+        before = queries[0]
+        start = time.perf_counter()
+        client.post('/api/virtual-assistant', json={'message': f"I have a headache #{turn}", 'user_id': user_id})
+        samples.append((time.perf_counter() - start) * 1000)
+        chat_queries += queries[0] - before
+    return dict(summarize(samples), db_queries_per_turn=round(chat_queries / turns, 3))
+
+
+def run(turns=2000, users=5000, write_every=50, seed_value=23):
+    server = FakeOpenAIServer(latency_ms=5, token_interval_ms=0).start()
+    gateway.api_key, gateway.base_url = 'fake', server.base_url
+    path = os.path.join(tempfile.mkdtemp(), 'patients.sqlite3')
+    app = create_app(path)
+    app.register_blueprint(chat_bp)
+    results = {}
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(path, users, random.Random(seed_value))
+            queries = [0]
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.__setitem__(0, queries[0] + 1))
+            client = app.test_client()
+            max_users = patient_context.max_users
+            for name, cache_size in (('uncached', 0), ('snapshot_cache', max_users)):
+                patient_context.max_users = cache_size
+                patient_context.clear()
+                patient_context.stats.update(dict.fromkeys(patient_context.stats, 0))
+                response_cache.backend.clear()
+                results[name] = replay(client, queries, turns, users, write_every, random.Random(seed_value))
+                lookups = patient_context.stats['hits'] + patient_context.stats['misses']
+                results[name]['context_hit_rate'] = round(patient_context.stats['hits'] / lookups, 4) if lookups else 0.0
+                results[name]['invalidations'] = patient_context.stats['invalidations']
+            patient_context.max_users = max_users
+    finally:
+        server.shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args()
+    report('patient_context', run(turns=args.turns, users=args.users))
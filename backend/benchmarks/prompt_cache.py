@@ -0,0 +1,97 @@
+"""
+Cached-prefix token savings of the prompt registry on a recorded workload.
+
+Replays the symptoms/languages in benchmarks/data/triage_responses.json and
+compares the old layout (language instruction prepended to the system prompt)
+with the registry layout (shared prefix first, language suffix last).
+Provider caching is modelled on OpenAI's rules: only prompts of at least 1024
+tokens are cached, in 128-token increments of the longest previously seen prefix.
+
+    cd backend && python -m benchmarks.prompt_cache
+"""
+import json
+import os
+import random
+
+from benchmarks.common import report
+from services.prompts import count_tokens, prompts
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'triage_responses.json')
+MIN_CACHEABLE_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+def legacy_layout(name, language):
+    template = prompts.template(name)
+    if not language:
+        return template.prefix
+    suffix = prompts.get(name, language).text[len(template.prefix) + 2:]
+    return suffix + "\n\n" + template.prefix
+
+
+def registry_layout(name, language):
+    return prompts.get(name, language).text
+
+
+def _common_prefix_len(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def replay(layout, workload):
+    seen = []
+    totals = {'requests': 0, 'prompt_tokens': 0, 'shared_prefix_tokens': 0, 'provider_cached_tokens': 0}
+    for name, symptoms, language in workload:
+        prompt = layout(name, language) + "\n" + symptoms
+        tokens = count_tokens(prompt)
+        shared = max((_common_prefix_len(prompt, previous) for previous in seen), default=0)
+        shared_tokens = count_tokens(prompt[:shared])
+        cached = 0
+        if tokens >= MIN_CACHEABLE_TOKENS and shared_tokens >= MIN_CACHEABLE_TOKENS:
+            cached = shared_tokens // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+        totals['requests'] += 1
+        totals['prompt_tokens'] += tokens
+        totals['shared_prefix_tokens'] += shared_tokens
+        totals['provider_cached_tokens'] += cached
+        if prompt not in seen:
+            seen.append(prompt)
+    totals['shared_prefix_ratio'] = round(totals['shared_prefix_tokens'] / totals['prompt_tokens'], 4)
+    return totals
+
+
+def cross_language_prefix(layout, names=('triage', 'triage_structured', 'assistant')):
+    """Tokens every language variant of a prompt has in common, i.e. reusable across languages."""
+    result = {}
+    for name in names:
+        variants = [layout(name, language) for language in prompts.languages]
+        shared = min(_common_prefix_len(variants[0], other) for other in variants[1:])
+        result[name] = count_tokens(variants[0][:shared])
+    return result
+
+
+def run(requests=500, seed=3):
+    with open(CORPUS, encoding='utf-8') as f:
+        corpus = json.load(f)
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(requests):
+        item = rng.choice(corpus)
+        name = rng.choice(('triage', 'assistant'))
+        workload.append((name, f"{item['symptoms']} #{rng.randrange(10_000)}", rng.choice(('en', 'ms', 'zh', 'ta'))))
+    return {
+        'legacy_layout': dict(replay(legacy_layout, workload),
+                              cross_language_prefix_tokens=cross_language_prefix(legacy_layout)),
+        'registry_layout': dict(replay(registry_layout, workload),
+                                cross_language_prefix_tokens=cross_language_prefix(registry_layout)),
+        'prompt_variants': {
+            f"{p.name}/{p.language or '-'}": {'tokens': p.tokens, 'shared_prefix_tokens': p.prefix_tokens}
+            for p in prompts.variants()
+        },
+    }
+
+
+if __name__ == '__main__':
+    report('prompt_cache', run())
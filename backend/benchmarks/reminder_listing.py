@@ -0,0 +1,111 @@
+"""
+Reminder listing on a seeded SQLite database (1M reminders by default).
+
+Compares the old listing (full ORM rows, every column, no index, no limit)
+with the paginated, projection-only endpoint backed by the composite indexes.
+
+    cd backend && python -m benchmarks.reminder_listing --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from flask import Flask, jsonify, request
+
+from benchmarks.common import report, summarize
+from extensions import db
+from models.reminder import MedicationReminder
+from models.user import User
+from routes.chronic import chronic_bp
+from routes.reminders import reminders_bp
+
+
+def create_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(app)
+    app.register_blueprint(reminders_bp)
+    app.register_blueprint(chronic_bp)
+
+    @app.route('/legacy/reminders')
+    def legacy_list_reminders():
+        reminders = MedicationReminder.query.filter_by(user_id=request.args.get('user_id')).all()
+        return jsonify([{
+            'id': r.id, 'medication': r.medication, 'dosage': r.dosage, 'frequency': r.frequency,
+            'start_date': r.start_date, 'end_date': r.end_date, 'times': r.times, 'taken_times': r.taken_times
+        } for r in reminders])
+
+    return app
+
+
+def seed(path, rows, users, rng):
+    conn = sqlite3.connect(path)
+    conn.executemany(f'INSERT INTO {User.__tablename__} (id, email, password_hash) VALUES (?, ?, ?)',
+                     ((u, f"user{u}@example.com", 'x') for u in range(1, users + 1)))
+    today = date.today()
+
+    def reminder_rows():
+        for i in range(1, rows + 1):
+            start = today - timedelta(days=rng.randrange(720))
+            end = start + timedelta(days=rng.randrange(7, 365))
+            taken = [f"{(start + timedelta(days=d)).isoformat()}T08:00" for d in range(rng.randrange(0, 90))]
+            yield (i, rng.randrange(1, users + 1), f"Medication {i % 500}", '500mg', 'twice daily',
+                   start.isoformat(), end.isoformat(), json.dumps(["08:00", "20:00"]), json.dumps(taken))
+
+    conn.executemany(
+        f'INSERT INTO {MedicationReminder.__tablename__} (id, user_id, medication, dosage, frequency, start_date, end_date, times, taken_times) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', reminder_rows()
+    )
+    conn.commit()
+    conn.close()
+
+
+def sample(client, url, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        response = client.get(url.format(user_id=user_id))
+        response.get_data()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def run(rows=1_000_000, users=10_000, requests=200, seed_value=11):
+    rng = random.Random(seed_value)
+    path = os.path.join(tempfile.mkdtemp(), 'reminders.sqlite3')
+    app = create_app(path)
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(path, rows, users, rng)
+        seed_s = time.perf_counter() - start
+        indexes = list(MedicationReminder.__table__.indexes)
+        user_ids = [rng.randrange(1, users + 1) for _ in range(requests)]
+        client = app.test_client()
+
+        for index in indexes:
+            index.drop(db.engine)
+        legacy = sample(client, '/legacy/reminders?user_id={user_id}', user_ids)
+        for index in indexes:
+            index.create(db.engine)
+        return {
+            'rows': rows,
+            'seed_s': round(seed_s, 2),
+            'legacy_unindexed_all_columns': legacy,
+            'legacy_indexed_all_columns': sample(client, '/legacy/reminders?user_id={user_id}', user_ids),
+            'paginated_projection': sample(client, '/api/reminders?user_id={user_id}&limit=50', user_ids),
+            'paginated_projection_active': sample(client, '/api/reminders?user_id={user_id}&limit=50&active=1', user_ids),
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    args = parser.parse_args()
+    report('reminder_listing', run(rows=args.rows, users=args.users))
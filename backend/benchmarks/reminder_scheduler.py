@@ -0,0 +1,87 @@
+"""
+Reminder scheduler simulation with a fake clock.
+
+Loads N active reminders (1M by default) with one to three daily slots,
+applies a stream of updates and snoozes, then advances the clock in
+one-second ticks and records CPU time per tick.
+
+    cd backend && python -m benchmarks.reminder_scheduler --reminders 1000000 --hours 24
+"""
+import argparse
+import random
+import resource
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import report, summarize
+from services.reminder_scheduler import ReminderScheduler
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def random_times(rng):
+    return [f"{rng.randrange(24):02d}:{rng.choice((0, 15, 30, 45)):02d}" for _ in range(rng.randint(1, 3))]
+
+
+def run(reminders=1_000_000, hours=24, updates_per_hour=20_000, seed=5):
+    rng = random.Random(seed)
+    start = datetime.combine(date.today(), datetime.min.time()).timestamp()
+    clock = FakeClock(start)
+    scheduler = ReminderScheduler(clock=clock)
+    today = date.today()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    load_start = time.perf_counter()
+    for reminder_id in range(1, reminders + 1):
+        scheduler.upsert(reminder_id, rng.randrange(1, reminders // 10 + 2),
+                         today - timedelta(days=rng.randrange(30)),
+                         today + timedelta(days=rng.randrange(1, 90)), random_times(rng))
+    load_s = time.perf_counter() - load_start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tick_ms, update_ms = [], []
+    fired = snoozes_fired = 0
+    pending_updates = 0.0
+    for second in range(hours * 3600):
+        clock.now = start + second
+        pending_updates += updates_per_hour / 3600
+        while pending_updates >= 1:
+            pending_updates -= 1
+            reminder_id = rng.randrange(1, reminders + 1)
+            t0 = time.perf_counter()
+            if rng.random() < 0.5:
+                scheduler.snooze(reminder_id, clock.now + 600)
+            else:
+                scheduler.upsert(reminder_id, 1, today, today + timedelta(days=30), random_times(rng))
+            update_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        due = scheduler.tick()
+        tick_ms.append((time.perf_counter() - t0) * 1000)
+        fired += len(due)
+        snoozes_fired += sum(1 for item in due if item[3])
+
+    return {
+        'reminders': reminders,
+        'simulated_hours': hours,
+        'load_s': round(load_s, 2),
+        # ru_maxrss is in kilobytes on Linux
+        'load_rss_mb': round((rss_after - rss_before) / 1024, 1),
+        'fired': fired,
+        'snoozes_fired': snoozes_fired,
+        'tick': summarize(tick_ms),
+        'update': summarize(update_ms),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reminders', type=int, default=1_000_000)
+    parser.add_argument('--hours', type=int, default=24)
+    args = parser.parse_args()
+    report('reminder_scheduler', run(reminders=args.reminders, hours=args.hours))
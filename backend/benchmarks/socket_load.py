@@ -0,0 +1,246 @@
+"""
+Socket.IO chat load test: many concurrent clients sending `chat_message`.
+
+Each client connects over WebSocket with its own user id (so it joins its user
+room), sends a few chat messages one after another and records the time to the
+first reply event and to the final `chat_response`. Part of the messages match
+an FAQ entry, the rest go through the streamed assistant. Clients are spread
+over several processes and round-robin over the given server URLs.
+
+With a message queue, every load process also pushes one `room_check` event
+to each of its clients' user rooms from outside the servers, which only arrives
+if rooms are shared between the backend processes.
+
+Against running servers:
+
+    cd backend && python -m benchmarks.socket_load --url http://127.0.0.1:5001 --url http://127.0.0.1:5002 \\
+        --clients 20000 --procs 8 --message-queue redis://127.0.0.1:6390/0
+
+Or let it start the fake OpenAI server, the Redis stand-in and N gevent backends itself:
+
+    cd backend && python -m benchmarks.socket_load --spawn 2 --clients 20000 --procs 8
+
+Needs the asyncio Socket.IO client extras (pip install aiohttp) and enough open files (ulimit -n).
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import socketio
+
+from benchmarks.common import report, summarize
+from data.faq_data import faq_data
+
+FREE_TEXT = (
+    "I have had a mild headache since this morning",
+    "What can I do about a sore throat?",
+    "My child has a runny nose and a slight fever",
+    "Is it normal to feel tired after a vaccine?",
+)
+
+
+def _raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+async def _client(index, worker, urls, args, stats, rng):
+    sio = socketio.AsyncClient(reconnection=False)
+    state = {'first': None, 'done': asyncio.Event()}
+
+    @sio.on('chat_response_chunk')
+    async def on_chunk(data):
+        if state['first'] is None:
+            state['first'] = time.perf_counter()
+
+    @sio.on('chat_response')
+    async def on_response(data):
+        if state['first'] is None:
+            state['first'] = time.perf_counter()
+        state['done'].set()
+
+    @sio.on('room_check')
+    async def on_room_check(data):
+        stats['room_received'] += 1
+
+    user_id = f"load-{worker}-{index}"
+    started = time.perf_counter()
+    try:
+        await sio.connect(urls[index % len(urls)], transports=['websocket'], auth={'user_id': user_id},
+                          wait_timeout=args.timeout)
+    except Exception:
+        stats['connect_errors'] += 1
+        return None
+    stats['connect_ms'].append((time.perf_counter() - started) * 1000)
+    await asyncio.sleep(rng.uniform(0, args.think_ms / 1000))
+    for _ in range(args.messages):
+        if rng.random() < args.faq_share:
+            text = rng.choice(faq_data)['q']
+        else:
+            text = f"{rng.choice(FREE_TEXT)} #{rng.randrange(1_000_000)}"
+        state['first'] = None
+        state['done'].clear()
+        sent = time.perf_counter()
+        try:
+            await sio.emit('chat_message', {'message': text})
+            await asyncio.wait_for(state['done'].wait(), args.timeout)
+        except Exception:
+            stats['message_errors'] += 1
+            continue
+        stats['first_reply_ms'].append((state['first'] - sent) * 1000)
+        stats['full_reply_ms'].append((time.perf_counter() - sent) * 1000)
+        await asyncio.sleep(rng.uniform(0, 2 * args.think_ms / 1000))
+    return sio, user_id
+
+
+async def _worker_main(worker, count, urls, args):
+    rng = random.Random(worker)
+    stats = {'connect_ms': [], 'first_reply_ms': [], 'full_reply_ms': [], 'connect_errors': 0,
+             'message_errors': 0, 'room_received': 0, 'room_sent': 0}
+    tasks = []
+    for index in range(count):
+        tasks.append(asyncio.create_task(_client(index, worker, urls, args, stats, rng)))
+        # Ramp up instead of opening every connection at once
+        if args.connect_rate:
+            await asyncio.sleep(args.procs / args.connect_rate)
+    started = time.perf_counter()
+    clients = [client for client in await asyncio.gather(*tasks) if client]
+    elapsed = time.perf_counter() - started
+
+    if args.message_queue and clients:
+        emitter = socketio.RedisManager(args.message_queue, channel=args.channel, write_only=True)
+        for _, user_id in clients:
+            emitter.emit('room_check', {'user_id': user_id}, namespace='/', room=f"user_{user_id}")
+            stats['room_sent'] += 1
+        deadline = time.perf_counter() + args.timeout
+        while stats['room_received'] < stats['room_sent'] and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+    await asyncio.gather(*(sio.disconnect() for sio, _ in clients), return_exceptions=True)
+    stats['elapsed_s'] = elapsed
+    return stats
+
+
+def _worker(worker, count, urls, args, results):
+    _raise_file_limit()
+    results.put(asyncio.run(_worker_main(worker, count, urls, args)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(url, process, timeout=60):
+    # gunicorn binds before the worker has imported the app, so wait for an actual response
+    deadline = time.time() + timeout
+    while time.time() < deadline and process.poll() is None:
+        try:
+            urllib.request.urlopen(url + '/', timeout=2).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Backend at {url} did not start")
+
+
+def spawn_backends(count, latency_ms, llm_concurrency):
+    """Fake OpenAI, the Redis stand-in and `count` gevent backend processes sharing them."""
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.fake_redis import FakeRedisServer
+
+    openai_server = FakeOpenAIServer(latency_ms=latency_ms).start()
+    redis_server = FakeRedisServer().start()
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, OPENAI_API_KEY='fake', OPENAI_BASE_URL=openai_server.base_url,
+               SOCKETIO_MESSAGE_QUEUE=redis_server.url, SOCKETIO_ASYNC_MODE='gevent',
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.sqlite3')}",
+               DIAGNOSIS_JOB_DB=os.path.join(workdir, 'jobs.sqlite3'),
+               LLM_MAX_CONCURRENCY=str(llm_concurrency), LLM_MAX_CONNECTIONS=str(llm_concurrency))
+    processes, urls = [], []
+    for _ in range(count):
+        port = _free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--worker-class', 'gevent', '-w', '1', '--worker-connections', '100000',
+             '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'wsgi:app'],
+            env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ))
+        urls.append(f"http://127.0.0.1:{port}")
+    for url, process in zip(urls, processes):
+        _wait_until_ready(url, process)
+    return urls, redis_server.url, [openai_server, redis_server], processes
+
+
+def run(args):
+    servers, processes = [], []
+    urls, message_queue = args.url, args.message_queue
+    if args.spawn:
+        urls, message_queue, servers, processes = spawn_backends(args.spawn, args.latency_ms, args.llm_concurrency)
+        args.message_queue = message_queue
+    try:
+        results = multiprocessing.Queue()
+        per_worker = [args.clients // args.procs + (1 if i < args.clients % args.procs else 0) for i in range(args.procs)]
+        workers = [multiprocessing.Process(target=_worker, args=(i, n, urls, args, results)) for i, n in enumerate(per_worker)]
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        for process in processes:
+            process.terminate()
+        for server in servers:
+            server.shutdown()
+
+    merged = {key: [] for key in ('connect_ms', 'first_reply_ms', 'full_reply_ms')}
+    for item in stats:
+        for key in merged:
+            merged[key].extend(item[key])
+    elapsed = max(item['elapsed_s'] for item in stats)
+    result = {
+        'servers': len(urls),
+        'clients': args.clients,
+        'connected': len(merged['connect_ms']),
+        'connect_errors': sum(item['connect_errors'] for item in stats),
+        'message_errors': sum(item['message_errors'] for item in stats),
+        'connect': summarize(merged['connect_ms']),
+        'first_reply': summarize(merged['first_reply_ms'], elapsed),
+        'full_reply': summarize(merged['full_reply_ms']),
+    }
+    if message_queue:
+        sent = sum(item['room_sent'] for item in stats)
+        result['room_check'] = {'sent': sent, 'received': sum(item['room_received'] for item in stats)}
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', action='append', default=[], help='Backend URL; repeat for several processes')
+    parser.add_argument('--spawn', type=int, default=0, help='Start this many local gevent backends instead')
+    parser.add_argument('--clients', type=int, default=10_000)
+    parser.add_argument('--procs', type=int, default=max(1, os.cpu_count() or 1))
+    parser.add_argument('--messages', type=int, default=3, help='chat messages per client')
+    parser.add_argument('--faq-share', type=float, default=0.5)
+    parser.add_argument('--think-ms', type=int, default=1000)
+    parser.add_argument('--connect-rate', type=float, default=2000, help='new connections per second, 0 for no ramp')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--latency-ms', type=int, default=300, help='fake OpenAI latency with --spawn')
+    parser.add_argument('--llm-concurrency', type=int, default=200,
+                        help='gateway concurrency per backend with --spawn; the fake server has no rate limit')
+    parser.add_argument('--message-queue', default=None)
+    parser.add_argument('--channel', default=os.getenv('SOCKETIO_CHANNEL', 'flask-socketio'))
+    args = parser.parse_args()
+    if not args.url and not args.spawn:
+        parser.error('give --url or --spawn')
+    _raise_file_limit()
+    report('socket_load', run(args))
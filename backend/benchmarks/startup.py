@@ -0,0 +1,101 @@
+"""
+Worker cold start: time and memory to import the app and run create_app().
+
+Every run is a fresh interpreter, like an autoscaled worker booting. One extra
+run under `-X importtime` lists the modules with the largest cumulative import
+time. With --budget-ms the median boot time is checked against a budget and
+the exit status is 1 when it is over, so CI can fail on startup regressions.
+
+    cd backend && python -m benchmarks.startup --runs 10 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile, report
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(first_call):
+    started = time.perf_counter()
+    from app import create_app
+    create_app()
+    result = {'boot_ms': (time.perf_counter() - started) * 1000,
+              'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              'openai_imported': 'openai' in sys.modules}
+    if first_call:
+        from benchmarks.fake_openai import FakeOpenAIServer
+        from services.llm import gateway
+        server = FakeOpenAIServer(latency_ms=0).start()
+        gateway.api_key, gateway.base_url = 'fake', server.base_url
+        started = time.perf_counter()
+        gateway.complete([{'role': 'user', 'content': 'ping'}])
+        result['first_llm_call_ms'] = (time.perf_counter() - started) * 1000
+        server.shutdown()
+    print(json.dumps(result))
+
+
+def _spawn(first_call):
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child'] + (['--first-call'] if first_call else [])
+    done = subprocess.run(command, cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True)
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def _env():
+    return dict(os.environ, DATABASE_URL=os.getenv('DATABASE_URL', 'sqlite://'),
+                OPENAI_API_KEY=os.getenv('OPENAI_API_KEY', 'fake'))
+
+
+def slowest_imports(top):
+    """Modules imported by the app (and what they import directly) by cumulative import time while importing the app and running create_app()."""
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+                          cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in done.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level; keep the first two levels
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative_us), name.strip()))
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for us, name in sorted(rows, reverse=True)[:top]]
+
+
+def run(runs=10, first_call=False, top=10):
+    samples = [_spawn(first_call) for _ in range(runs)]
+    boot = [s['boot_ms'] for s in samples]
+    result = {
+        'runs': runs,
+        'boot_p50_ms': round(percentile(boot, 50), 1),
+        'boot_max_ms': round(max(boot), 1),
+        'rss_p50_mb': round(percentile([s['rss_kb'] for s in samples], 50) / 1024, 1),
+        'openai_imported_at_boot': any(s['openai_imported'] for s in samples),
+        'slowest_imports': slowest_imports(top),
+    }
+    if first_call:
+        result['first_llm_call_p50_ms'] = round(percentile([s['first_llm_call_ms'] for s in samples], 50), 1)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, help='Fail when the median boot time is over this')
+    parser.add_argument('--first-call', action='store_true', help='Also time the first LLM call, which loads openai')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.first_call)
+        sys.exit(0)
+    results = run(runs=args.runs, first_call=args.first_call)
+    if args.budget_ms:
+        results['budget_ms'] = args.budget_ms
+        results['within_budget'] = results['boot_p50_ms'] <= args.budget_ms
+    report('startup', results)
+    if args.budget_ms and not results['within_budget']:
+        sys.exit(1)
@@ -0,0 +1,272 @@
+"""
+End-to-end benchmark suite for the backend's hot paths, runnable offline.
+
+Imports the real app against a seeded SQLite database (users, reminders and
+chronic conditions) and points the LLM gateway at the fake OpenAI server,
+which replays the recorded triage completions with a fixed latency. Each case
+drives the app through the Flask or Socket.IO test client from `--concurrency`
+threads. Messages are unique per call, so the response cache doesn't hide the
+LLM path.
+
+    cd backend && python -m benchmarks.suite --output bench.json
+    cd backend && python -m benchmarks.suite --compare bench.json
+
+Prints one JSON document with the environment, the parameters and, per case,
+the count, throughput and p50/p95/p99/max latency. With --compare the
+relative change of p50, p95 and throughput against an earlier run is added.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from benchmarks.common import report, summarize
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'triage_responses.json')
+CASES = ('faq_search', 'chat', 'virtual_assistant', 'diagnosis', 'reminders_crud', 'socket_chat')
+FREE_TEXT = (
+    "I have had a mild headache since this morning",
+    "What can I do about a sore throat?",
+    "My child has a runny nose and a slight fever",
+    "Is it normal to feel tired after a vaccine?",
+)
+
+
+def _configure_environment(workdir):
+    # Must run before the app is imported: it reads these at import time
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'suite.sqlite3')}"
+    os.environ['DIAGNOSIS_JOB_DB'] = os.path.join(workdir, 'jobs.sqlite3')
+    os.environ['SEMANTIC_INDEX_DIR'] = os.path.join(workdir, 'semantic_index')
+    os.environ['SEMANTIC_ANSWER_LOG'] = os.path.join(workdir, 'semantic_answers.jsonl')
+    os.environ.setdefault('OPENAI_API_KEY', 'fake')
+    os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'threading')
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _check(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f"Unexpected status {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def _drive(call, iterations, concurrency):
+    """Run call(i) iterations times over `concurrency` threads; per-call latency summary plus throughput."""
+    samples, errors = [], []
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            call(i)
+        except Exception as e:
+            errors.append(str(e))
+            return
+        samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(iterations)))
+    result = summarize(samples, time.perf_counter() - started)
+    result['errors'] = len(errors)
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+class Suite:
+    def __init__(self, app, socketio, users, seed):
+        self.app = app
+        self.socketio = socketio
+        self.users = users
+        self.seed = seed
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        # One test client per worker thread
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def _user(self, i):
+        return random.Random(self.seed * 1_000_003 + i).randrange(1, self.users + 1)
+
+    def faq_search(self, iterations, concurrency):
+        from data.faq_data import faq_data
+        questions = [entry['q'] for entry in faq_data]
+
+        def call(i):
+            _check(self.client.get('/api/faq/search', query_string={'q': questions[i % len(questions)]}), 200)
+        return _drive(call, iterations, concurrency)
+
+    def chat(self, iterations, concurrency):
+        def call(i):
+            _check(self.client.post('/api/chat', json={'message': f"{FREE_TEXT[i % len(FREE_TEXT)]} #{i}",
+                                                       'user_id': self._user(i)}), 200)
+        return _drive(call, iterations, concurrency)
+
+    def virtual_assistant(self, iterations, concurrency):
+        def call(i):
+            _check(self.client.post('/api/virtual-assistant', json={
+                'message': f"{FREE_TEXT[i % len(FREE_TEXT)]} #{i}", 'user_id': self._user(i)
+            }), 200)
+        return _drive(call, iterations, concurrency)
+
+    def diagnosis(self, iterations, concurrency):
+        with open(CORPUS, encoding='utf-8') as f:
+            corpus = json.load(f)
+
+        def call(i):
+            case = corpus[i % len(corpus)]
+            _check(self.client.post('/api/diagnosis', json={
+                'symptoms': f"{case['symptoms']} #{i}", 'language': case.get('language', 'en'),
+                'user_id': self._user(i)
+            }), 200)
+        return _drive(call, iterations, concurrency)
+
+    def reminders_crud(self, iterations, concurrency):
+        """Create, list, update and delete one reminder per iteration; each step is reported separately."""
+        steps = {'create': [], 'list': [], 'update': [], 'delete': []}
+
+        def timed_step(name, fn):
+            started = time.perf_counter()
+            response = fn()
+            steps[name].append((time.perf_counter() - started) * 1000)
+            return response
+
+        def call(i):
+            user_id = self._user(i)
+            created = timed_step('create', lambda: _check(self.client.post('/api/reminders', json={
+                'user_id': user_id, 'medication': 'Paracetamol', 'dosage': '500mg', 'frequency': 'daily',
+                'times': ['08:00'], 'start_date': date.today().isoformat()
+            }), 201))
+            reminder_id = created.get_json()['id']
+            timed_step('list', lambda: _check(self.client.get('/api/reminders', query_string={'user_id': user_id}), 200))
+            timed_step('update', lambda: _check(self.client.put(f'/api/reminders/{reminder_id}', json={
+                'dosage': '1g', 'times': ['08:00', '20:00']
+            }), 200))
+            timed_step('delete', lambda: _check(self.client.delete(f'/api/reminders/{reminder_id}'), 200))
+
+        result = _drive(call, iterations, concurrency)
+        result['steps'] = {name: summarize(samples) for name, samples in steps.items()}
+        return result
+
+    def socket_chat(self, iterations, concurrency, faq_share=0.5, timeout=30):
+        """chat_message round trips on one socket per thread: half FAQ answers, half streamed assistant replies."""
+        from data.faq_data import faq_data
+
+        def socket():
+            if not hasattr(self._local, 'socket'):
+                self._local.socket = self.socketio.test_client(
+                    self.app, auth={'user_id': self._user(threading.get_ident())}
+                )
+            return self._local.socket
+
+        def call(i):
+            rng = random.Random(self.seed + i)
+            if rng.random() < faq_share:
+                text = rng.choice(faq_data)['q']
+            else:
+                text = f"{FREE_TEXT[i % len(FREE_TEXT)]} #{i}"
+            client = socket()
+            client.emit('chat_message', {'message': text})
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                if any(event['name'] == 'chat_response' for event in client.get_received()):
+                    return
+                time.sleep(0.001)
+            raise TimeoutError('No chat_response')
+
+        return _drive(call, iterations, concurrency)
+
+
+def seed_database(app, users, seed):
+    from benchmarks.patient_context import seed as seed_patients
+    from extensions import db
+
+    with app.app_context():
+        db.create_all()
+        path = db.engine.url.database
+    seed_patients(path, users, random.Random(seed))
+
+
+def compare(results, baseline):
+    """Relative change per case of p50/p95 (lower is better) and throughput (higher is better)."""
+    changes = {}
+    for case, current in results.items():
+        before = baseline.get('results', {}).get('cases', {}).get(case)
+        if not before:
+            continue
+        changes[case] = {
+            key: round((current[key] - before[key]) / before[key], 4)
+            for key in ('p50_ms', 'p95_ms', 'throughput_per_s') if before.get(key) and key in current
+        }
+    return changes
+
+
+def run(cases=CASES, iterations=200, concurrency=4, latency_ms=50, users=500, seed=7):
+    workdir = tempfile.mkdtemp()
+    _configure_environment(workdir)
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from app import create_app
+    from extensions import socketio
+    from services.llm import gateway
+
+    with open(CORPUS, encoding='utf-8') as f:
+        replies = [case['completion'] for case in json.load(f)]
+    server = FakeOpenAIServer(latency_ms=latency_ms, replies=replies, seed=seed, token_interval_ms=0).start()
+    gateway.api_key, gateway.base_url = 'fake', server.base_url
+    app = create_app()
+    seed_database(app, users, seed)
+    suite = Suite(app, socketio, users, seed)
+    results = {}
+    try:
+        for case in cases:
+            getattr(suite, case)(min(iterations, 10), concurrency)  # warm-up
+            results[case] = getattr(suite, case)(iterations, concurrency)
+    finally:
+        server.shutdown()
+    return {
+        'environment': {'git_revision': _git_revision(), 'python': platform.python_version(),
+                        'platform': platform.platform(), 'cpus': os.cpu_count(),
+                        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')},
+        'parameters': {'iterations': iterations, 'concurrency': concurrency, 'llm_latency_ms': latency_ms,
+                       'users': users, 'seed': seed},
+        'cases': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--case', action='append', choices=CASES, help='Run only these cases (repeatable)')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency-ms', type=int, default=50, help='fake OpenAI latency before each reply')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Also write the results to this file')
+    parser.add_argument('--compare', help='Results file of an earlier run to compare against')
+    args = parser.parse_args()
+    results = run(cases=args.case or CASES, iterations=args.iterations, concurrency=args.concurrency,
+                  latency_ms=args.latency_ms, users=args.users, seed=args.seed)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            results['changes'] = compare(results['cases'], json.load(f))
+    report('suite', results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'suite', 'results': results}, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,74 @@
+"""
+Triage parser microbenchmark over recorded completions (benchmarks/data/triage_responses.json).
+
+Compares the old post-hoc regex extraction from app.ai_diagnosis with
+TriageParser on whole replies and on replies fed in small streamed deltas.
+
+    cd backend && python -m benchmarks.triage_parser
+"""
+import json
+import os
+import re
+
+from benchmarks.common import report, summarize, timed
+from services.triage_parser import TriageParser, parse_triage
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'triage_responses.json')
+
+
+def legacy_parse(result):
+    """The extraction previously inlined in app.ai_diagnosis, kept for comparison."""
+    def extract_section(text, section):
+        pattern = rf"{section}:(.*?)(?:\n[A-Z][a-zA-Z ]+:|$)"
+        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+        return None
+
+    possible_conditions = extract_section(result, "Potential Conditions")
+    extract_section(result, "Red Flags")
+    additional_notes = extract_section(result, "Additional Notes for Doctor")
+    urgency_score_match = re.search(r"Urgency Score:\s*(\d+)", result, re.IGNORECASE)
+    if urgency_score_match:
+        urgency_level = max(1, min(int(urgency_score_match.group(1)), 10))
+    else:
+        urgency_score_match = re.search(r"(?:urgency|priority|severity).*?(\d+)[/\s]*(?:10)?", result, re.IGNORECASE)
+        urgency_level = max(1, min(int(urgency_score_match.group(1)), 10)) if urgency_score_match else 5
+    if additional_notes:
+        lines = additional_notes.split('\n')
+        filtered = [
+            line for line in lines
+            if not re.search(r"I'm sorry|I recommend|I'm here to support|Take care|your health and well-being|feel free to ask", line, re.IGNORECASE)
+        ]
+        additional_notes = '\n'.join(filtered).strip()
+    conditions_list = []
+    if possible_conditions:
+        for cond in re.split(r'\n-|\n\d+\.', possible_conditions):
+            if cond and cond.strip():
+                conditions_list.append({"condition": cond.strip(), "confidence": 1.0})
+    return conditions_list, urgency_level, additional_notes
+
+
+def parse_streamed(text, chunk_size=8):
+    parser = TriageParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    parser.close()
+    return parser.result()
+
+
+def run(rounds=500):
+    with open(CORPUS, encoding='utf-8') as f:
+        completions = [item['completion'] for item in json.load(f)]
+    results = {}
+    for name, fn in (('legacy_regex', legacy_parse), ('parser_whole', parse_triage), ('parser_streamed', parse_streamed)):
+        samples = []
+        for _ in range(rounds):
+            for text in completions:
+                samples.append(timed(fn, text)[1])
+        results[name] = summarize(samples)
+    return results
+
+
+if __name__ == '__main__':
+    report('triage_parser', run())
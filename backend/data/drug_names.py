@@ -0,0 +1,22 @@
+# Medicines whose name changes what a correct answer is, e.g. in dosing questions.
+# Generic and common Malaysian brand names, with the Malay and Chinese names patients type.
+drug_names = [
+    "paracetamol", "acetaminophen", "panadol", "ibuprofen", "nurofen", "aspirin", "naproxen", "diclofenac",
+    "mefenamic", "ponstan", "celecoxib", "tramadol", "codeine", "morphine",
+    "amoxicillin", "augmentin", "azithromycin", "clarithromycin", "erythromycin", "cephalexin", "cefuroxime",
+    "ciprofloxacin", "doxycycline", "metronidazole", "cotrimoxazole", "penicillin",
+    "metformin", "gliclazide", "glibenclamide", "sitagliptin", "insulin",
+    "amlodipine", "nifedipine", "perindopril", "lisinopril", "enalapril", "losartan", "telmisartan",
+    "atenolol", "bisoprolol", "propranolol", "hydrochlorothiazide", "frusemide", "furosemide",
+    "atorvastatin", "simvastatin", "rosuvastatin", "warfarin", "clopidogrel", "heparin",
+    "salbutamol", "ventolin", "budesonide", "fluticasone", "montelukast", "prednisolone", "dexamethasone",
+    "cetirizine", "loratadine", "chlorpheniramine", "piriton", "diphenhydramine",
+    "omeprazole", "esomeprazole", "pantoprazole", "ranitidine", "famotidine", "loperamide",
+    "domperidone", "metoclopramide",
+    "levothyroxine", "thyroxine", "carbimazole", "allopurinol", "colchicine",
+    "sertraline", "fluoxetine", "escitalopram", "amitriptyline", "diazepam", "alprazolam",
+    "gabapentin", "carbamazepine", "valproate", "phenytoin", "levetiracetam",
+    "folic", "iron", "vitamin",
+    "扑热息痛", "对乙酰氨基酚", "布洛芬", "阿司匹林", "阿莫西林", "头孢", "二甲双胍", "胰岛素", "氨氯地平",
+    "阿托伐他汀", "华法林", "沙丁胺醇", "泼尼松龙", "西替利嗪", "奥美拉唑",
+]
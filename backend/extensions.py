@@ -1,7 +1,25 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 
 db = SQLAlchemy()
 jwt = JWTManager()
-socketio = SocketIO(cors_allowed_origins="*") 
\ No newline at end of file
+socketio = SocketIO(cors_allowed_origins="*")
+
+def socketio_options():
+    """
+    Socket.IO settings from the environment, passed to socketio.init_app.
+    SOCKETIO_ASYNC_MODE picks the server (threading by default; wsgi.py switches to gevent after
+    monkey patching, since auto-detection would pick gevent even in an unpatched dev server) and
+    SOCKETIO_MESSAGE_QUEUE (e.g. redis://host:6379/0) lets several backend processes share rooms.
+    """
+    return {
+        'async_mode': os.getenv('SOCKETIO_ASYNC_MODE') or 'threading',
+        'message_queue': os.getenv('SOCKETIO_MESSAGE_QUEUE') or None,
+        'channel': os.getenv('SOCKETIO_CHANNEL', 'flask-socketio'),
+    }
+
+def user_room(user_id):
+    """Socket.IO room every connection of a user joins, for pushes targeted at that user."""
+    return f"user_{user_id}"
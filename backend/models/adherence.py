@@ -0,0 +1,13 @@
+from extensions import db
+
+class DailyAdherence(db.Model):
+    """Doses taken per reminder per day, kept up to date as DoseEvent rows are inserted."""
+    __table_args__ = (
+        db.Index('ix_daily_adherence_user_day', 'user_id', 'day'),
+        db.Index('ix_daily_adherence_day', 'day'),
+    )
+
+    reminder_id = db.Column(db.Integer, db.ForeignKey('medication_reminder.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    doses_taken = db.Column(db.Integer, nullable=False, default=0)
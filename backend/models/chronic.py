@@ -2,8 +2,12 @@ from extensions import db
 from sqlalchemy import func
 
 class ChronicCondition(db.Model):
+    __table_args__ = (
+        db.Index('ix_chronic_condition_user_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     condition = db.Column(db.String(64), nullable=False)
     notes = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,16 @@
+from extensions import db
+
+class DoseEvent(db.Model):
+    """One taken dose. Rows are only ever inserted; replaces MedicationReminder.taken_times."""
+    __table_args__ = (
+        # Lets offline clients resend a batch without double counting
+        db.UniqueConstraint('reminder_id', 'scheduled_at', name='uq_dose_event_reminder_scheduled'),
+        db.Index('ix_dose_event_user_taken', 'user_id', 'taken_at'),
+        db.Index('ix_dose_event_taken', 'taken_at'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    reminder_id = db.Column(db.Integer, db.ForeignKey('medication_reminder.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    scheduled_at = db.Column(db.DateTime, nullable=True)
+    taken_at = db.Column(db.DateTime, nullable=False)
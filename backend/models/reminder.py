@@ -1,7 +1,15 @@
 from extensions import db
 from sqlalchemy import func
 
+# Postgres stores the time lists as arrays; SQLite (local runs, benchmarks) falls back to JSON
+StringArray = db.ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
 class MedicationReminder(db.Model):
+    __table_args__ = (
+        db.Index('ix_medication_reminder_user_end', 'user_id', 'end_date'),
+        db.Index('ix_medication_reminder_user_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     medication = db.Column(db.String(120), nullable=False)
@@ -9,6 +17,7 @@ class MedicationReminder(db.Model):
     frequency = db.Column(db.String(64), nullable=True)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=True)
-    times = db.Column(db.ARRAY(db.String), nullable=True)  # e.g., ["08:00", "20:00"]
-    taken_times = db.Column(db.ARRAY(db.String), nullable=True)  # times taken
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    times = db.Column(StringArray, nullable=True)  # e.g., ["08:00", "20:00"]
+    taken_times = db.Column(StringArray, nullable=True)  # legacy, doses are now recorded as DoseEvent rows
+    snoozed_until = db.Column(db.DateTime, nullable=True)  # extra one-off firing, server local time
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
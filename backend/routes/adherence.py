@@ -0,0 +1,21 @@
+from datetime import date
+from flask import Blueprint, jsonify, request
+from services.adherence import daily_adherence
+
+adherence_bp = Blueprint('adherence', __name__)
+
+def _date_arg(name):
+    value = request.args.get(name)
+    return date.fromisoformat(value) if value else None
+
+@adherence_bp.route('/api/adherence', methods=['GET'])
+def get_adherence():
+    """
+    Doses taken per day from the daily rollups.
+    Query args: user_id (omit for all users), from and to as YYYY-MM-DD.
+    """
+    try:
+        start, end = _date_arg('from'), _date_arg('to')
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    return jsonify(daily_adherence(request.args.get('user_id', type=int), start, end))
@@ -0,0 +1,90 @@
+import io
+import json
+from flask import Response, jsonify, request, stream_with_context
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from extensions import db
+from services.bulk import bulk_write
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/jsonlines')
+
+def is_ndjson():
+    return request.mimetype in NDJSON_MIMETYPES
+
+def _ndjson_items(stream):
+    # The WSGI input stream is unbuffered, so reading lines from it directly is one call per byte
+    for line in io.BufferedReader(stream, 64 * 1024):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None  # rejected by the item parser, keeping later indexes aligned
+
+def request_items():
+    """
+    Items of a bulk request: an NDJSON body (one item per line, read incrementally from the
+    request stream so large imports are never held in memory) or a JSON {"items": [...]}.
+    """
+    if is_ndjson():
+        return _ndjson_items(request.stream)
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        return data.get('items') or []
+    return data if isinstance(data, list) else []
+
+def _rejected(error, index):
+    """Error body and status for a batch the database refused; index is the first item of the failing chunk."""
+    status = 409 if isinstance(error, IntegrityError) else 400 if isinstance(error, DataError) else 500
+    detail = getattr(error, 'orig', None) or error
+    return {'error': f"Batch rejected at item {index}, nothing was written: {detail}", 'index': index}, status
+
+def bulk_response(model, parse, after_commit=None):
+    """
+    Apply a bulk request in one transaction and report every item's result.
+    JSON requests get {"created", "updated", "deleted", "errors", "results": [...]}; NDJSON
+    requests get one result line per item as it is written, then the summary line.
+    after_commit(written_ids, deleted_ids, user_ids) runs once the transaction has committed.
+    """
+    summary = {'created': 0, 'updated': 0, 'deleted': 0, 'errors': 0}
+    written, deleted, user_ids = [], [], set()
+
+    def apply():
+        for result in bulk_write(model, request_items(), parse):
+            status = result['status']
+            summary['errors' if status == 'error' else status] += 1
+            if status == 'deleted':
+                deleted.append(result['id'])
+            elif status != 'error':
+                written.append(result['id'])
+            if status != 'error':
+                user_ids.add(result['user_id'])
+            yield result
+        db.session.commit()
+        if after_commit:
+            after_commit(written, deleted, user_ids)
+
+    # Results come out a chunk at a time once the chunk is written, so a database error is in the chunk
+    # starting at the number of results so far; it aborts the transaction, so the whole batch is rolled back
+    if not is_ndjson():
+        results = []
+        try:
+            results.extend(apply())
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            body, status = _rejected(e, len(results))
+            return jsonify(body), status
+        return jsonify(dict(summary, results=results))
+
+    def generate():
+        done = 0
+        try:
+            for result in apply():
+                done += 1
+                yield json.dumps(result) + "\n"
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            body, _ = _rejected(e, done)
+            yield json.dumps(dict(body, committed=False)) + "\n"
+            return
+        yield json.dumps(dict(summary, committed=True)) + "\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
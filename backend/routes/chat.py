@@ -1,14 +1,42 @@
 from flask import Blueprint, request, jsonify
-from services.gpt import ask_gpt
-from services.virtual_health_assistant import ask_virtual_health_assistant
+from routes.streaming import stream_answer, wants_stream
+from services.gpt import ask_gpt, stream_gpt
+from services.nlp import answer_locally, is_personalized, remember_answer
+from services.virtual_health_assistant import ask_virtual_health_assistant, stream_virtual_health_assistant
 
 chat_bp = Blueprint('chat', __name__)
 
+def local_reply(local, data):
+    """A FAQ or semantic match, in the same shape as an LLM reply."""
+    if wants_stream(data):
+        return stream_answer(iter([local.answer]))
+    return jsonify({"answer": local.answer})
+
+def remember(user_message, answer, language):
+    try:
+        remember_answer(user_message, answer, language=language)
+    except Exception as e:
+        print(f"Error storing chat reply for semantic matching: {str(e)}")
+
+def remembering(chunks, user_message, language):
+    """Pass the streamed reply through, then remember the assembled answer."""
+    parts = []
+    for delta in chunks:
+        parts.append(delta)
+        yield delta
+    remember(user_message, ''.join(parts), language)
+
 @chat_bp.route('/api/chat', methods=['POST'])
 def chat():
     data = request.get_json()
     user_message = data.get('message', '')
-    answer = ask_gpt(user_message)
+    user_id = data.get('user_id')
+    local = answer_locally(user_message)
+    if local:
+        return local_reply(local, data)
+    if wants_stream(data):
+        return stream_answer(stream_gpt(user_message, user_id=user_id))
+    answer = ask_gpt(user_message, user_id=user_id)
     return jsonify({"answer": answer})
 
 @chat_bp.route('/api/virtual-assistant', methods=['POST'])
@@ -16,5 +44,16 @@ def virtual_assistant():
     data = request.get_json()
     user_message = data.get('message', '')
     language = data.get('language')
-    answer = ask_virtual_health_assistant(user_message, language_hint=language)
-    return jsonify({"answer": answer}) 
\ No newline at end of file
+    user_id = data.get('user_id')
+    local = answer_locally(user_message, language=language)
+    if local:
+        return local_reply(local, data)
+    # Replies personalized with the patient's conditions are not reusable for other users
+    learn = not is_personalized(user_id)
+    if wants_stream(data):
+        chunks = stream_virtual_health_assistant(user_message, language_hint=language, user_id=user_id)
+        return stream_answer(remembering(chunks, user_message, language) if learn else chunks)
+    answer = ask_virtual_health_assistant(user_message, language_hint=language, user_id=user_id)
+    if learn:
+        remember(user_message, answer, language)
+    return jsonify({"answer": answer})
@@ -1,17 +1,23 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
 from models.chronic import ChronicCondition
+from routes.bulk import bulk_response
+from routes.pagination import keyset_page, page_args, page_response
+from services.bulk import BulkItemError, check_columns, item_id, item_op
+from services.patient_context import patient_context
 
 chronic_bp = Blueprint('chronic', __name__)
 
 @chronic_bp.route('/api/chronic', methods=['GET'])
 def get_chronic():
+    """A page of a user's conditions. Query args: limit, cursor (see X-Next-Cursor)."""
     user_id = request.args.get('user_id')
-    conditions = ChronicCondition.query.filter_by(user_id=user_id).all()
-    return jsonify([
-        {'id': c.id, 'condition': c.condition, 'notes': c.notes}
-        for c in conditions
-    ])
+    limit, cursor = page_args()
+    query = db.session.query(ChronicCondition.id, ChronicCondition.condition, ChronicCondition.notes).filter(
+        ChronicCondition.user_id == user_id
+    )
+    rows = keyset_page(query, ChronicCondition.id, limit, cursor)
+    return page_response([{'id': r.id, 'condition': r.condition, 'notes': r.notes} for r in rows], limit)
 
 @chronic_bp.route('/api/chronic', methods=['POST'])
 def add_chronic():
@@ -23,6 +29,7 @@ def add_chronic():
     )
     db.session.add(chronic)
     db.session.commit()
+    patient_context.invalidate(chronic.user_id)
     return jsonify({'id': chronic.id}), 201
 
 @chronic_bp.route('/api/chronic/<int:chronic_id>', methods=['PUT'])
@@ -32,4 +39,28 @@ def update_chronic(chronic_id):
     if 'notes' in data:
         chronic.notes = data['notes']
     db.session.commit()
-    return jsonify({'success': True}) 
\ No newline at end of file
+    patient_context.invalidate(chronic.user_id)
+    return jsonify({'success': True})
+
+def _bulk_chronic(item):
+    op = item_op(item)
+    if op == 'delete':
+        return op, item_id(item)
+    if op == 'update':
+        if 'notes' not in item:
+            raise BulkItemError('Nothing to update')
+        return op, check_columns(ChronicCondition, {'id': item_id(item), 'notes': item['notes']})
+    if not item.get('user_id') or not item.get('condition'):
+        raise BulkItemError('user_id and condition are required')
+    return op, check_columns(ChronicCondition, {'user_id': item_id(item, 'user_id'), 'condition': item['condition'],
+                                                'notes': item.get('notes', '')})
+
+@chronic_bp.route('/api/chronic/bulk', methods=['POST'])
+def bulk_chronic():
+    """
+    Create, update (notes) and delete many conditions in one transaction.
+    Items look like add_chronic bodies plus "op" ("create" by default, "update" or "delete")
+    and "id" for updates and deletes; JSON {"items": [...]} or application/x-ndjson.
+    """
+    return bulk_response(ChronicCondition, _bulk_chronic,
+                         after_commit=lambda written, deleted, user_ids: patient_context.invalidate(*user_ids))
\ No newline at end of file
@@ -0,0 +1,31 @@
+from flask import Blueprint, jsonify, request
+from routes.jobs import submit_diagnosis_job, wants_job
+from routes.streaming import sse_event, sse_response, wants_stream
+from services.diagnosis import diagnose, stream_diagnosis
+
+diagnosis_bp = Blueprint('diagnosis', __name__)
+
+@diagnosis_bp.route('/api/diagnosis', methods=['POST'])
+def ai_diagnosis():
+    data = request.get_json()
+    symptoms = data.get('symptoms', '')
+    language = data.get('language', 'en')
+    user_id = data.get('user_id')
+    if wants_job(data):
+        return submit_diagnosis_job(data)
+    if wants_stream(data):
+        # Each section goes out as soon as it is complete, e.g. red flags before the notes are written
+        def events():
+            try:
+                for field, value in stream_diagnosis(symptoms, language=language, user_id=user_id):
+                    yield sse_event(value if field == 'done' else {'field': field, 'value': value},
+                                    event='done' if field == 'done' else 'section')
+            except Exception as e:
+                print(f"Error in AI diagnosis: {str(e)}")
+                yield sse_event({'error': str(e)}, event='error')
+        return sse_response(events())
+    try:
+        return jsonify(diagnose(symptoms, language=language, structured=data.get('structured'), user_id=user_id))
+    except Exception as e:
+        print(f"Error in AI diagnosis: {str(e)}")
+        return jsonify({"error": str(e)}), 500
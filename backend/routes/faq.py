@@ -1,8 +1,20 @@
-from flask import Blueprint, jsonify
-from data.faq_data import faq_data
+from flask import Blueprint, jsonify, request
+from services.faq_index import faq_repository
+from services.nlp import search_faq
 
 faq_bp = Blueprint('faq', __name__)
 
 @faq_bp.route('/api/faq', methods=['GET'])
 def get_faq():
-    return jsonify(faq_data) 
\ No newline at end of file
+    return jsonify(faq_repository.entries)
+
+@faq_bp.route('/api/faq/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '')
+    top_k = min(request.args.get('top_k', 5, type=int), 50)
+    matches = search_faq(query, top_k=top_k)
+    return jsonify([
+        {'category': m.entry.get('category'), 'q': m.entry['q'], 'a': m.entry['a'],
+         'score': round(m.score, 4), 'confidence': round(m.confidence, 4)}
+        for m in matches
+    ])
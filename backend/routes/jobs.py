@@ -0,0 +1,35 @@
+from flask import Blueprint, current_app, jsonify, request, url_for
+from services.jobs import QueueFull, diagnosis_workers, job_queue
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def wants_job(data):
+    """Clients opt in to job mode with {"async": true} or a `Prefer: respond-async` header."""
+    return bool(data.get('async')) or 'respond-async' in request.headers.get('Prefer', '')
+
+def submit_diagnosis_job(data):
+    """
+    Queue a diagnosis and answer 202 with the job id right away. The result is available from
+    GET /api/diagnosis/jobs/<id> and is pushed as a `diagnosis_result` socket event to the
+    user's room (user_id) and/or the socket given as "sid".
+    """
+    try:
+        job_id, priority = diagnosis_workers.submit(
+            current_app._get_current_object(), data.get('symptoms', ''), language=data.get('language', 'en'),
+            structured=data.get('structured'), user_id=data.get('user_id'), sid=data.get('sid')
+        )
+    except QueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    location = url_for('jobs.get_diagnosis_job', job_id=job_id)
+    return jsonify({'job_id': job_id, 'status': 'pending', 'priority': priority, 'url': location}), 202, {'Location': location}
+
+@jobs_bp.route('/api/diagnosis/jobs/<job_id>', methods=['GET'])
+def get_diagnosis_job(job_id):
+    # Jobs left over from before a restart resume once anyone polls
+    diagnosis_workers.ensure_started(current_app._get_current_object())
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
@@ -0,0 +1,27 @@
+from flask import jsonify, request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def page_args():
+    """(limit, cursor) from the query string; cursor is the last id of the previous page."""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), request.args.get('cursor', type=int)
+
+def keyset_page(query, id_column, limit, cursor):
+    """Keyset pagination: rows after the cursor id, fetching one extra row to know if another page exists."""
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    return query.order_by(id_column).limit(limit + 1).all()
+
+def page_response(items, limit):
+    """JSON list of the page; X-Next-Cursor is set when more rows are available."""
+    has_more = len(items) > limit
+    items = items[:limit]
+    response = jsonify(items)
+    if has_more:
+        response.headers['X-Next-Cursor'] = str(items[-1]['id'])
+    return response
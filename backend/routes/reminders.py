@@ -1,24 +1,41 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, abort, request, jsonify
 from extensions import db
 from models.reminder import MedicationReminder
-from datetime import date
+from routes.bulk import bulk_response
+from routes.pagination import flag, keyset_page, page_args, page_response
+from services.adherence import dose_slot, parse_dose_time, record_doses, taken_times_for
+from services.bulk import BulkItemError, check_columns, item_id, item_op
+from services.patient_context import patient_context
+from services.reminder_dispatch import reschedule_reminders, schedule_reminder, snooze_scheduled, unschedule_reminder
+from sqlalchemy import or_
+from datetime import date, datetime, time, timedelta
 
 reminders_bp = Blueprint('reminders', __name__)
 
+LIST_COLUMNS = ('id', 'medication', 'dosage', 'frequency', 'start_date', 'end_date', 'times')
+WRITE_FIELDS = ('medication', 'dosage', 'frequency', 'start_date', 'end_date', 'times')
+MAX_SNOOZE_MINUTES = 7 * 24 * 60
+
 @reminders_bp.route('/api/reminders', methods=['GET'])
 def list_reminders():
+    """
+    A page of a user's reminders, selecting only the listed columns.
+    Query args: limit, cursor (see X-Next-Cursor), active=1 for reminders that have not ended,
+    include_taken=1 to also return taken_times from the recorded dose events.
+    """
     user_id = request.args.get('user_id')
-    reminders = MedicationReminder.query.filter_by(user_id=user_id).all()
-    return jsonify([{
-        'id': r.id,
-        'medication': r.medication,
-        'dosage': r.dosage,
-        'frequency': r.frequency,
-        'start_date': r.start_date,
-        'end_date': r.end_date,
-        'times': r.times,
-        'taken_times': r.taken_times
-    } for r in reminders])
+    limit, cursor = page_args()
+    query = db.session.query(*(getattr(MedicationReminder, c) for c in LIST_COLUMNS)).filter(
+        MedicationReminder.user_id == user_id
+    )
+    if flag('active'):
+        query = query.filter(or_(MedicationReminder.end_date.is_(None), MedicationReminder.end_date >= date.today()))
+    items = [dict(zip(LIST_COLUMNS, row)) for row in keyset_page(query, MedicationReminder.id, limit, cursor)]
+    if flag('include_taken'):
+        taken = taken_times_for([item['id'] for item in items[:limit]])
+        for item in items:
+            item['taken_times'] = taken.get(item['id'], [])
+    return page_response(items, limit)
 
 @reminders_bp.route('/api/reminders', methods=['POST'])
 def add_reminder():
@@ -30,11 +47,12 @@ def add_reminder():
         frequency=data.get('frequency'),
         start_date=date.fromisoformat(data['start_date']),
         end_date=date.fromisoformat(data['end_date']) if data.get('end_date') else None,
-        times=data.get('times', []),
-        taken_times=[]
+        times=data.get('times', [])
     )
     db.session.add(reminder)
     db.session.commit()
+    schedule_reminder(reminder)
+    patient_context.invalidate(reminder.user_id)
     return jsonify({'id': reminder.id}), 201
 
 @reminders_bp.route('/api/reminders/<int:reminder_id>', methods=['PUT'])
@@ -45,26 +63,150 @@ def update_reminder(reminder_id):
         if field in data:
             setattr(reminder, field, data[field])
     db.session.commit()
+    schedule_reminder(reminder)
+    patient_context.invalidate(reminder.user_id)
     return jsonify({'success': True})
 
 @reminders_bp.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
 def delete_reminder(reminder_id):
     reminder = MedicationReminder.query.get_or_404(reminder_id)
+    user_id = reminder.user_id
     db.session.delete(reminder)
     db.session.commit()
+    unschedule_reminder(reminder_id)
+    patient_context.invalidate(user_id)
     return jsonify({'success': True})
 
+def _valid_times(times):
+    if times is None:
+        return True
+    if not isinstance(times, list):
+        return False
+    for value in times:
+        if not isinstance(value, str):
+            return False
+        try:
+            time.fromisoformat(value)
+        except ValueError:
+            return False
+    return True
+
+def _bulk_reminder(item):
+    op = item_op(item)
+    if op == 'delete':
+        return op, item_id(item)
+    values = {field: item[field] for field in WRITE_FIELDS if field in item}
+    try:
+        for field in ('start_date', 'end_date'):
+            if field in values:
+                values[field] = date.fromisoformat(values[field]) if values[field] else None
+    except (TypeError, ValueError):
+        raise BulkItemError('Invalid date') from None
+    if 'times' in values and not _valid_times(values['times']):
+        raise BulkItemError('times must be a list of "HH:MM" strings')
+    check_columns(MedicationReminder, values)
+    if op == 'update':
+        if not values:
+            raise BulkItemError('Nothing to update')
+        if ('start_date' in values and values['start_date'] is None) or ('medication' in values and not values['medication']):
+            raise BulkItemError('medication and start_date cannot be empty')
+        return op, dict(values, id=item_id(item))
+    if not item.get('user_id') or not values.get('medication') or not values.get('start_date'):
+        raise BulkItemError('user_id, medication and start_date are required')
+    # Every create carries the same columns so the batch is a single executemany
+    return op, {'user_id': item_id(item, 'user_id'), 'medication': values['medication'], 'dosage': values.get('dosage'),
+                'frequency': values.get('frequency'), 'start_date': values['start_date'],
+                'end_date': values.get('end_date'), 'times': values.get('times') or []}
+
+def _after_bulk(written_ids, deleted_ids, user_ids):
+    reschedule_reminders(written_ids, deleted_ids)
+    patient_context.invalidate(*user_ids)
+
+@reminders_bp.route('/api/reminders/bulk', methods=['POST'])
+def bulk_reminders():
+    """
+    Create, update and delete many reminders in one transaction, e.g. a clinic import.
+    Items look like add_reminder bodies plus "op" ("create" by default, "update" or "delete")
+    and "id" for updates and deletes. Send {"items": [...]} as JSON or one item per line
+    as application/x-ndjson to stream large imports.
+    """
+    return bulk_response(MedicationReminder, _bulk_reminder, after_commit=_after_bulk)
+
+def _dose(reminder_id, user_id, data):
+    """
+    Dose event row from a request item; `time` is the "HH:MM" slot (or ISO timestamp) being taken.
+    A slot is placed on the day of taken_at, so doses synced later keep their own day.
+    """
+    taken_at = parse_dose_time(data.get('taken_at')) or datetime.now()
+    return {
+        'reminder_id': reminder_id,
+        'user_id': user_id,
+        'scheduled_at': dose_slot(data.get('scheduled_at') or data.get('time'), taken_at),
+        'taken_at': taken_at,
+    }
+
 @reminders_bp.route('/api/reminders/<int:reminder_id>/mark-taken', methods=['POST'])
 def mark_taken(reminder_id):
-    reminder = MedicationReminder.query.get_or_404(reminder_id)
-    time = request.json.get('time')
-    if reminder.taken_times is None:
-        reminder.taken_times = []
-    reminder.taken_times.append(time)
+    user_id = db.session.query(MedicationReminder.user_id).filter_by(id=reminder_id).scalar()
+    if user_id is None:
+        abort(404)
+    try:
+        dose = _dose(reminder_id, user_id, request.get_json(silent=True) or {})
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid time'}), 400
+    inserted = record_doses([dose])
     db.session.commit()
-    return jsonify({'success': True})
+    return jsonify({'success': True, 'duplicate': inserted == 0})
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+@reminders_bp.route('/api/reminders/doses', methods=['POST'])
+def ingest_doses():
+    """
+    Batch of doses from an offline client: {"doses": [{"reminder_id", "time" or "scheduled_at", "taken_at"}, ...]}.
+    Valid items are written in one transaction; invalid ones are reported by index.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('doses', []) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({'error': 'doses must be a list'}), 400
+    reminder_ids = {item.get('reminder_id') for item in items if isinstance(item, dict) and _is_id(item.get('reminder_id'))}
+    owners = dict(db.session.query(MedicationReminder.id, MedicationReminder.user_id).filter(
+        MedicationReminder.id.in_(reminder_ids)
+    )) if reminder_ids else {}
+    doses, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not _is_id(item.get('reminder_id')):
+            errors.append({'index': index, 'error': 'Invalid reminder_id'})
+            continue
+        if item['reminder_id'] not in owners:
+            errors.append({'index': index, 'error': 'Unknown reminder'})
+            continue
+        try:
+            doses.append(_dose(item['reminder_id'], owners[item['reminder_id']], item))
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'error': 'Invalid time'})
+    inserted = record_doses(doses)
+    db.session.commit()
+    return jsonify({'inserted': inserted, 'duplicates': len(doses) - inserted, 'errors': errors})
 
 @reminders_bp.route('/api/reminders/<int:reminder_id>/snooze', methods=['POST'])
 def snooze_reminder(reminder_id):
-    # For now, just acknowledge the snooze
-    return jsonify({'success': True, 'message': 'Reminder snoozed'}) 
\ No newline at end of file
+    """Fire the reminder again later: {"minutes": 10} (default, up to a week) or {"until": ISO timestamp}."""
+    reminder = MedicationReminder.query.get_or_404(reminder_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        until = parse_dose_time(data.get('until'))
+        if until is None:
+            minutes = float(data.get('minutes', 10))
+            # Also rejects nan and inf, which compare False
+            if not 0 < minutes <= MAX_SNOOZE_MINUTES:
+                raise ValueError(minutes)
+            until = datetime.now() + timedelta(minutes=minutes)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid snooze time'}), 400
+    reminder.snoozed_until = until
+    db.session.commit()
+    snooze_scheduled(reminder, until)
+    return jsonify({'success': True, 'message': 'Reminder snoozed', 'snoozed_until': until.isoformat(timespec='seconds')}) 
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Socket.IO event handlers; importing this module registers them on the shared socketio instance."""
+import time
+from flask import request
+from flask_socketio import emit, join_room
+from extensions import socketio, user_room
+from services.metrics import gauge, histogram
+from services.nlp import FALLBACK_ANSWER, answer_locally, is_personalized, remember_answer
+from services.observability import timed_socket_event
+from services.virtual_health_assistant import stream_virtual_health_assistant
+
+SOCKET_CONNECTIONS = gauge('socketio_connections', 'Open Socket.IO connections in this process')
+CHAT_REPLY_SECONDS = histogram(
+    'socketio_chat_reply_seconds', 'Time from a chat_message to the first reply event', ['source']
+)
+
+@socketio.on('connect')
+@timed_socket_event('connect')
+def handle_connect(auth=None):
+    SOCKET_CONNECTIONS.inc()
+    # Join the user's room so reminders and other pushes can target them
+    user_id = (auth or {}).get('user_id') or request.args.get('user_id')
+    if user_id:
+        join_room(user_room(user_id))
+
+@socketio.on('disconnect')
+@timed_socket_event('disconnect')
+def handle_disconnect(reason=None):
+    SOCKET_CONNECTIONS.dec()
+
+@socketio.on('chat_message')
+@timed_socket_event('chat_message')
+def handle_chat_message(data):
+    received = time.perf_counter()
+    message = data.get('message', '')
+    language = data.get('language')
+    local = answer_locally(message, language=language)
+    if local:
+        emit('chat_response', {'answer': local.answer})
+        CHAT_REPLY_SECONDS.observe(time.perf_counter() - received, source=local.source)
+        return
+    # No local answer: stream the assistant reply without holding up the socket handler.
+    # The patient context is looked up here, while the app context is available.
+    try:
+        chunks = stream_virtual_health_assistant(message, language_hint=language, user_id=data.get('user_id'))
+        # Replies personalized with the patient's conditions are not reusable for other users
+        learn = None if is_personalized(data.get('user_id')) else (message, language)
+    except Exception as e:
+        print(f"Error preparing chat reply: {str(e)}")
+        emit('chat_response', {'answer': FALLBACK_ANSWER})
+        CHAT_REPLY_SECONDS.observe(time.perf_counter() - received, source='fallback')
+        return
+    socketio.start_background_task(stream_chat_reply, request.sid, chunks, received, learn)
+
+def stream_chat_reply(sid, chunks, received, learn=None):
+    parts = []
+    try:
+        for delta in chunks:
+            if not parts:
+                CHAT_REPLY_SECONDS.observe(time.perf_counter() - received, source='assistant')
+            parts.append(delta)
+            socketio.emit('chat_response_chunk', {'delta': delta}, to=sid)
+    except Exception as e:
+        print(f"Error streaming chat reply: {str(e)}")
+        socketio.emit('chat_response', {'answer': FALLBACK_ANSWER}, to=sid)
+        CHAT_REPLY_SECONDS.observe(time.perf_counter() - received, source='fallback')
+        return
+    # Final assembled message for clients that don't handle chunks
+    answer = ''.join(parts)
+    socketio.emit('chat_response', {'answer': answer}, to=sid)
+    if learn:
+        try:
+            remember_answer(learn[0], answer, language=learn[1])
+        except Exception as e:
+            print(f"Error storing chat reply for semantic matching: {str(e)}")
@@ -0,0 +1,35 @@
+import json
+from flask import Response, request, stream_with_context
+
+def wants_stream(data):
+    """Clients opt in with {"stream": true} in the body or an event-stream Accept header."""
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(payload, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def stream_answer(chunks):
+    """
+    Server-Sent Events response with one unnamed event per text delta,
+    followed by a `done` event carrying the assembled answer.
+    """
+    def generate():
+        parts = []
+        try:
+            for delta in chunks:
+                parts.append(delta)
+                yield sse_event({'delta': delta})
+        except Exception as e:
+            print(f"Error while streaming answer: {str(e)}")
+            yield sse_event({'error': str(e)}, event='error')
+            return
+        yield sse_event({'answer': ''.join(parts)}, event='done')
+    return sse_response(generate())
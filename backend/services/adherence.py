@@ -0,0 +1,158 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import distinct, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models.adherence import DailyAdherence
+from models.dose_event import DoseEvent
+from models.reminder import MedicationReminder
+
+BATCH_SIZE = 500
+
+
+def _insert(model):
+    # ON CONFLICT is dialect specific; Postgres in production, SQLite for local runs
+    dialect = db.session.get_bind().dialect.name
+    return (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(model)
+
+
+def parse_dose_time(value, on_date=None):
+    """
+    datetime from an ISO timestamp, or from an "HH:MM" slot on on_date (default today).
+    Timezone-aware values are converted to server local time. Raises ValueError on bad input.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            parsed = datetime.combine(on_date or date.today(), time.fromisoformat(value))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def dose_slot(value, taken_at):
+    """
+    Scheduled time of a dose taken at taken_at: an ISO timestamp as is, or an "HH:MM" slot on the
+    day it was taken. A slot more than 12 hours after taken_at was the previous day's (a late
+    evening dose taken after midnight). Raises ValueError on bad input.
+    """
+    slot = parse_dose_time(value, on_date=taken_at.date())
+    if slot is not None and isinstance(value, str) and _is_slot(value) and slot - taken_at > timedelta(hours=12):
+        slot -= timedelta(days=1)
+    return slot
+
+
+def _is_slot(value):
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return True
+    return False
+
+
+def record_doses(doses):
+    """
+    Insert dose events (dicts with reminder_id, user_id, scheduled_at, taken_at) and add
+    them to the daily rollups. Events already recorded for the same (reminder_id, scheduled_at)
+    are skipped. Returns the number of new events; the caller commits.
+    """
+    inserted = 0
+    for i in range(0, len(doses), BATCH_SIZE):
+        stmt = _insert(DoseEvent).values(doses[i:i + BATCH_SIZE]).on_conflict_do_nothing(
+            index_elements=['reminder_id', 'scheduled_at']
+        ).returning(DoseEvent.reminder_id, DoseEvent.user_id, DoseEvent.taken_at)
+        rows = db.session.execute(stmt).all()
+        inserted += len(rows)
+        counts = Counter((r.reminder_id, r.user_id, r.taken_at.date()) for r in rows)
+        if not counts:
+            continue
+        rollup = _insert(DailyAdherence).values([
+            {'reminder_id': reminder_id, 'user_id': user_id, 'day': day, 'doses_taken': n}
+            for (reminder_id, user_id, day), n in counts.items()
+        ])
+        db.session.execute(rollup.on_conflict_do_update(
+            index_elements=['reminder_id', 'day'],
+            set_={'doses_taken': DailyAdherence.doses_taken + rollup.excluded.doses_taken}
+        ))
+    return inserted
+
+
+def taken_times_for(reminder_ids):
+    """{reminder_id: [ISO taken_at, ...]} for the given reminders, oldest first."""
+    taken = defaultdict(list)
+    if not reminder_ids:
+        return taken
+    rows = db.session.query(DoseEvent.reminder_id, DoseEvent.taken_at).filter(
+        DoseEvent.reminder_id.in_(reminder_ids)
+    ).order_by(DoseEvent.reminder_id, DoseEvent.taken_at)
+    for reminder_id, taken_at in rows:
+        taken[reminder_id].append(taken_at.isoformat())
+    return taken
+
+
+def daily_adherence(user_id=None, start=None, end=None):
+    """Doses taken per day from the rollups, for one user or across all users."""
+    query = db.session.query(
+        DailyAdherence.day,
+        func.sum(DailyAdherence.doses_taken),
+        func.count(distinct(DailyAdherence.user_id)),
+    )
+    if user_id is not None:
+        query = query.filter(DailyAdherence.user_id == user_id)
+    if start is not None:
+        query = query.filter(DailyAdherence.day >= start)
+    if end is not None:
+        query = query.filter(DailyAdherence.day <= end)
+    return [
+        {'day': day.isoformat(), 'doses_taken': int(taken), 'users': users}
+        for day, taken, users in query.group_by(DailyAdherence.day).order_by(DailyAdherence.day)
+    ]
+
+
+def migrate_taken_times(batch_size=1000):
+    """
+    Copy legacy MedicationReminder.taken_times arrays into DoseEvent rows.
+    The arrays were appended as doses were taken, so an "HH:MM" entry without a date goes on the
+    day of the entry before it, or the next day when it is not later than that entry; the first
+    undated entry goes on the reminder's start_date. Safe to re-run: the days come out the same,
+    so already migrated doses are skipped.
+    """
+    last_id = 0
+    migrated = 0
+    while True:
+        rows = db.session.query(
+            MedicationReminder.id, MedicationReminder.user_id, MedicationReminder.start_date,
+            MedicationReminder.taken_times
+        ).filter(
+            MedicationReminder.id > last_id, MedicationReminder.taken_times.isnot(None)
+        ).order_by(MedicationReminder.id).limit(batch_size).all()
+        if not rows:
+            return migrated
+        doses = []
+        for reminder_id, user_id, start_date, taken_times in rows:
+            previous = None
+            for value in taken_times or []:
+                try:
+                    if isinstance(value, str) and _is_slot(value):
+                        taken_at = parse_dose_time(value, on_date=previous.date() if previous else start_date)
+                        if previous is not None and taken_at <= previous:
+                            taken_at += timedelta(days=1)
+                    else:
+                        taken_at = parse_dose_time(value)
+                except (TypeError, ValueError):
+                    print(f"Skipping unreadable taken time {value!r} on reminder {reminder_id}")
+                    continue
+                if taken_at is not None:
+                    previous = taken_at
+                    doses.append({'reminder_id': reminder_id, 'user_id': user_id,
+                                  'scheduled_at': taken_at, 'taken_at': taken_at})
+        migrated += record_doses(doses)
+        db.session.commit()
+        last_id = rows[-1].id
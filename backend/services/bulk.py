@@ -0,0 +1,112 @@
+from itertools import islice
+
+from sqlalchemy import String, delete, insert, select, update
+
+from extensions import db
+
+BULK_CHUNK_SIZE = 500
+OPS = ('create', 'update', 'delete')
+# Largest INTEGER on Postgres; a bigger id fails the whole statement instead of one item
+MAX_ID = 2 ** 31 - 1
+
+
+class BulkItemError(ValueError):
+    """An item of a bulk request that cannot be applied; reported in its result, the rest still go through."""
+
+
+def item_op(item):
+    """The item's operation ("op", default create), after checking it is an object."""
+    if not isinstance(item, dict):
+        raise BulkItemError('Item must be a JSON object')
+    op = item.get('op', 'create')
+    if op not in OPS:
+        raise BulkItemError(f"Unknown op {op!r}")
+    return op
+
+
+def item_id(item, field='id'):
+    try:
+        value = int(item[field])
+    except (KeyError, TypeError, ValueError):
+        raise BulkItemError(f"A numeric {field} is required") from None
+    if not 0 < value <= MAX_ID:
+        raise BulkItemError(f"{field} is out of range")
+    return value
+
+
+def check_columns(model, values):
+    """Reject values the database would refuse for the whole batch: non-strings or too long strings for String columns."""
+    columns = model.__table__.columns
+    for name, value in values.items():
+        column = columns.get(name)
+        if value is None or column is None or not isinstance(column.type, String):
+            continue
+        if not isinstance(value, str):
+            raise BulkItemError(f"{name} must be a string")
+        if column.type.length and len(value) > column.type.length:
+            raise BulkItemError(f"{name} is longer than {column.type.length} characters")
+    return values
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_write(model, items, parse, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Apply a stream of create/update/delete items to `model` (which has a user_id column), chunk by chunk.
+
+    parse(item) returns (op, values): ('create', column dict), ('update', column dict
+    including 'id') or ('delete', id), and raises BulkItemError for invalid items.
+    Each chunk is written with one executemany per operation and a result dict is
+    yielded per item, in input order; applied items carry the owning user_id. Nothing is committed; the caller commits once
+    the generator is exhausted so the whole batch lands in one transaction.
+    Within a chunk creates run before updates, and updates before deletes.
+    """
+    offset = 0
+    for chunk in chunked(items, chunk_size):
+        results = [None] * len(chunk)
+        creates, updates, deletes = [], [], []
+        for i, item in enumerate(chunk):
+            try:
+                op, values = parse(item)
+            except BulkItemError as e:
+                results[i] = {'index': offset + i, 'status': 'error', 'error': str(e)}
+                continue
+            {'create': creates, 'update': updates, 'delete': deletes}[op].append((i, values))
+
+        if creates:
+            ids = db.session.scalars(
+                insert(model).returning(model.id, sort_by_parameter_order=True),
+                [values for _, values in creates]
+            ).all()
+            for (i, values), id_ in zip(creates, ids):
+                results[i] = {'index': offset + i, 'status': 'created', 'id': id_, 'user_id': values['user_id']}
+
+        wanted = {values['id'] for _, values in updates} | {id_ for _, id_ in deletes}
+        existing = dict(db.session.execute(select(model.id, model.user_id).where(model.id.in_(wanted))).all()) if wanted else {}
+
+        def found(i, id_):
+            if id_ in existing:
+                return True
+            results[i] = {'index': offset + i, 'status': 'error', 'error': 'Not found'}
+            return False
+
+        updates = [(i, values) for i, values in updates if found(i, values['id'])]
+        deletes = [(i, id_) for i, id_ in deletes if found(i, id_)]
+
+        if updates:
+            db.session.execute(update(model), [values for _, values in updates])
+            for i, values in updates:
+                results[i] = {'index': offset + i, 'status': 'updated', 'id': values['id'], 'user_id': existing[values['id']]}
+        if deletes:
+            db.session.execute(
+                delete(model).where(model.id.in_([id_ for _, id_ in deletes])).execution_options(synchronize_session=False)
+            )
+            for i, id_ in deletes:
+                results[i] = {'index': offset + i, 'status': 'deleted', 'id': id_, 'user_id': existing[id_]}
+
+        offset += len(chunk)
+        yield from results
@@ -0,0 +1,40 @@
+import os
+import time
+from services.gpt import ask_gpt, stream_gpt
+from services.observability import add_request_time
+from services.triage_parser import TriageParser, parse_triage, parse_triage_json
+
+# Ask the model for JSON output by default instead of parsing the sectioned text
+STRUCTURED_OUTPUT = os.getenv('DIAGNOSIS_STRUCTURED_OUTPUT', '').lower() in ('1', 'true', 'yes')
+
+def diagnose(symptoms, language='en', structured=None, user_id=None):
+    """Run the triage completion and return the diagnosis payload served by /api/diagnosis."""
+    if structured is None:
+        structured = STRUCTURED_OUTPUT
+    result = ask_gpt(symptoms, language=language, structured=structured, user_id=user_id)
+    started = time.perf_counter()
+    try:
+        if structured:
+            try:
+                return parse_triage_json(result)
+            except (ValueError, AttributeError):
+                # The model ignored JSON mode; the sectioned parser still copes with most replies
+                return parse_triage(result)
+        return parse_triage(result)
+    finally:
+        add_request_time('parse', time.perf_counter() - started)
+
+def stream_diagnosis(symptoms, language='en', user_id=None):
+    """
+    Yield (field, value) events as each triage section completes, then ('done', payload).
+    """
+    parser = TriageParser()
+    parsing = 0.0
+    for delta in stream_gpt(symptoms, language=language, user_id=user_id):
+        started = time.perf_counter()
+        events = parser.feed(delta)
+        parsing += time.perf_counter() - started
+        yield from events
+    yield from parser.close()
+    add_request_time('parse', parsing)
+    yield 'done', parser.result()
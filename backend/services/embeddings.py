@@ -0,0 +1,74 @@
+import os
+import zlib
+
+import numpy as np
+
+from services.faq_index import normalize
+
+DEFAULT_DIM = 256
+
+
+class HashingEmbedder:
+    """
+    CPU-only text embedding from hashed character n-grams, with no model to download.
+
+    Character n-grams survive typos, inflections and word order changes, and work the
+    same for Latin, Tamil and CJK scripts. Each n-gram is hashed (crc32, so vectors are
+    stable across processes and can be stored) to a signed bucket; the vector is L2
+    normalized, so a dot product is the cosine similarity.
+
+    It measures spelling, not meaning: "5 year old" and "15 year old" score close, and a
+    question and its translation score near zero. Hence semantic is False, and the matcher
+    only uses it against curated FAQ entries.
+    """
+    semantic = False
+
+    def __init__(self, dim=DEFAULT_DIM, ngrams=(2, 3, 4)):
+        self.dim = dim
+        self.ngrams = tuple(ngrams)
+        # v2: normalize() keeps combining marks inside words, which changes Tamil vectors
+        self.name = f"hashing-v2-{dim}-{'.'.join(map(str, self.ngrams))}"
+
+    def _vector(self, text):
+        padded = f" {normalize(text)} "
+        buckets, signs = [], []
+        for n in self.ngrams:
+            for i in range(len(padded) - n + 1):
+                h = zlib.crc32(padded[i:i + n].encode('utf-8'))
+                buckets.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+        vector = np.bincount(buckets, weights=signs, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts):
+        """Float32 array of shape (len(texts), dim) with unit-length rows."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i] = self._vector(text)
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model on CPU, e.g. paraphrase-multilingual-MiniLM-L12-v2 for en/ms/zh/ta."""
+    semantic = True
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers-{model_name.replace('/', '_')}"
+
+    def encode(self, texts):
+        return self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder():
+    """EMBEDDING_MODEL names a sentence-transformers model; unset (or unavailable) means the hashing embedder."""
+    model_name = os.getenv('EMBEDDING_MODEL')
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"Error loading embedding model {model_name}, using the hashing embedder: {str(e)}")
+    return HashingEmbedder(int(os.getenv('EMBEDDING_DIM', str(DEFAULT_DIM))))
@@ -0,0 +1,196 @@
+import csv
+import json
+import os
+import re
+import runpy
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter, namedtuple
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FAQ_SOURCE = os.path.join(BACKEND_DIR, 'data', 'faq_data.py')
+
+
+def _mark_class():
+    """
+    Regex class of the Unicode combining marks (category M), which \\w does not include.
+    Only the Basic Multilingual Plane is scanned: it holds the marks of Tamil, Chinese and
+    most other scripts, and scanning all of Unicode would add a quarter second to startup.
+    """
+    ranges, start, previous = [], None, None
+    for code in range(0x10000):
+        if unicodedata.category(chr(code)).startswith('M'):
+            if start is None:
+                start = code
+            elif code != previous + 1:
+                ranges.append((start, previous))
+                start = code
+            previous = code
+    ranges.append((start, previous))
+    return '[' + ''.join(f'\\u{a:04x}-\\u{b:04x}' for a, b in ranges) + ']'
+
+
+# CJK characters are indexed one by one since they are not space separated. Vowel signs and
+# viramas in Tamil and other Indic scripts are marks, so they must not split words.
+_TOKEN_RE = re.compile(rf"[\u3400-\u9fff]|(?:[^\W_]|{_mark_class()})+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from have how i if in is it me my of on or
+should the to what when where which who why will with you your
+""".split())
+
+FaqMatch = namedtuple('FaqMatch', ['entry', 'score', 'confidence'])
+
+
+def normalize(text):
+    return ' '.join(_TOKEN_RE.findall((text or '').lower()))
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+class FaqIndex:
+    """
+    BM25 index over FAQ questions.
+    Term weights are precomputed per posting at build time and stored token by token in
+    flat numpy arrays, so a lookup sums the postings of the query terms in one bincount
+    instead of scanning every entry.
+    """
+
+    def __init__(self, entries, k1=1.5, b=0.75, min_confidence=0.3):
+        self.entries = list(entries)
+        self.min_confidence = min_confidence
+        self._exact = {}
+        self._vocab = {}
+        tokens, docs, freqs, lengths = array('i'), array('i'), array('i'), array('i')
+        for doc_id, item in enumerate(self.entries):
+            self._exact.setdefault(normalize(item['q']), doc_id)
+            tf = Counter(tokenize(item['q']))
+            lengths.append(sum(tf.values()))
+            for token, freq in tf.items():
+                tokens.append(self._vocab.setdefault(token, len(self._vocab)))
+                docs.append(doc_id)
+                freqs.append(freq)
+
+        n_docs = len(self.entries)
+        tokens, docs = np.array(tokens, dtype=np.int64), np.array(docs, dtype=np.int32)
+        freqs, lengths = np.array(freqs, dtype=np.float64), np.array(lengths, dtype=np.float64)
+        avgdl = float(lengths.mean()) if n_docs else 0.0
+        df = np.bincount(tokens, minlength=len(self._vocab))
+        idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / avgdl) if avgdl else np.full(n_docs, k1)
+        weights = idf[tokens] * freqs * (k1 + 1) / (freqs + norm[docs])
+        self._self_scores = np.bincount(docs, weights, minlength=n_docs)
+
+        # Postings grouped by token: token i owns _doc_ids/_weights[_offsets[i]:_offsets[i + 1]]
+        order = np.argsort(tokens, kind='stable')
+        self._doc_ids = docs[order]
+        self._weights = weights[order]
+        self._offsets = np.concatenate([[0], np.cumsum(df)])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, top_k=5, min_confidence=None):
+        """
+        Return up to top_k FaqMatch tuples ranked by BM25 score.
+        Confidence is the score relative to the entry's score against its own question.
+        """
+        if min_confidence is None:
+            min_confidence = self.min_confidence
+        exact = self._exact.get(normalize(query))
+        if exact is not None:
+            return [FaqMatch(self.entries[exact], float(self._self_scores[exact]), 1.0)]
+
+        spans = [slice(self._offsets[i], self._offsets[i + 1])
+                 for i in (self._vocab.get(token) for token in set(tokenize(query))) if i is not None]
+        if not spans:
+            return []
+        scores = np.bincount(np.concatenate([self._doc_ids[s] for s in spans]),
+                             np.concatenate([self._weights[s] for s in spans]), minlength=len(self.entries))
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+        candidates = candidates[np.argsort(scores[candidates], kind='stable')[::-1]]
+
+        matches = []
+        for doc_id in candidates:
+            score = float(scores[doc_id])
+            confidence = min(1.0, score / self._self_scores[doc_id])
+            if confidence >= min_confidence:
+                matches.append(FaqMatch(self.entries[doc_id], score, float(confidence)))
+        return matches
+
+
+def load_faq_entries(path):
+    """Load FAQ entries ({'category', 'q', 'a'}) from a .py, .json or .csv source."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.py':
+        return list(runpy.run_path(path)['faq_data'])
+    if ext == '.json':
+        with open(path, encoding='utf-8') as f:
+            return list(json.load(f))
+    if ext == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            return [
+                {'category': row.get('category', ''), 'q': row['q'], 'a': row['a']}
+                for row in csv.DictReader(f)
+            ]
+    raise ValueError(f"Unsupported FAQ source: {path}")
+
+
+class FaqRepository:
+    """
+    Holds the current FaqIndex and rebuilds it when the source file changes.
+    The source mtime is checked at most once every check_interval seconds.
+    """
+
+    def __init__(self, source=None, check_interval=2.0):
+        self.source = source or os.getenv('FAQ_SOURCE', DEFAULT_FAQ_SOURCE)
+        self.check_interval = check_interval
+        self._index = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _source_mtime(self):
+        try:
+            return os.stat(self.source).st_mtime
+        except OSError:
+            return None
+
+    def reload(self):
+        with self._lock:
+            mtime = self._source_mtime()
+            self._index = FaqIndex(load_faq_entries(self.source))
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def index(self):
+        index = self._index
+        if index is None:
+            return self.reload()
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            mtime = self._source_mtime()
+            if mtime is not None and mtime != self._mtime:
+                try:
+                    return self.reload()
+                except Exception as e:
+                    # Keep serving the previous index if the new source is broken
+                    print(f"Error reloading FAQ from {self.source}: {str(e)}")
+        return index
+
+    @property
+    def entries(self):
+        return self.index().entries
+
+
+faq_repository = FaqRepository()
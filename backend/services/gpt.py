@@ -1,67 +1,23 @@
-import os
-from dotenv import load_dotenv
-import openai
+from services.llm import gateway
+from services.patient_context import patient_context
+from services.prompts import prompts
+from services.response_cache import response_cache
 
-# Load environment variables from .env file
-load_dotenv()
+def _triage_request(name, message, language, user_id):
+    patient = patient_context.get(user_id)
+    prompt, messages = prompts.messages(name, message, language, context=patient and patient.text)
+    return messages, response_cache.make_key('triage', message, prompt.language, prompt.key, patient and patient.digest)
 
-api_key = os.getenv("OPENAI_API_KEY")
-print(f"Loaded API key: {api_key[:10]}...")  # Print first 10 characters to confirm loaded
+def ask_gpt(message, language=None, structured=False, user_id=None):
+    """
+    Triage completion for the given symptoms, personalized with the user's records when user_id is given.
+    With structured=True the model is asked for a JSON object (see parse_triage_json) instead of the sectioned text.
+    """
+    messages, key = _triage_request('triage_structured' if structured else 'triage', message, language, user_id)
+    kwargs = {'response_format': {'type': 'json_object'}} if structured else {}
+    return response_cache.get_or_compute(key, lambda: gateway.complete(messages, **kwargs))
 
-client = openai.OpenAI(api_key=api_key)
-
-def ask_gpt(message, language=None):
-    system_prompt = (
-        "You are a professional, concise, and highly knowledgeable medical triage assistant. "
-        "Your job is to analyze the symptoms described by the user and provide a structured, clear, and medically accurate triage summary.\n\n"
-        "IMPORTANT: FOLLOW THIS FORMAT EXACTLY, WITH THESE EXACT SECTION HEADERS:\n\n"
-        "Potential Conditions:\n"
-        "- Gastroenteritis: Inflammation of the gastrointestinal tract, most commonly due to a viral or bacterial infection, causing abdominal pain.\n"
-        "- 胃肠炎: 胃肠道的炎症，通常由病毒或细菌感染引起，导致腹痛。\n"
-        "- Gastroenteritis: Keradangan saluran gastrousus, paling sering disebabkan oleh jangkitan virus atau bakteria, menyebabkan kesakitan abdomen.\n"
-        "- Peptic Ulcer Disease: Erosion of the stomach lining or duodenum, leading to abdominal pain that can be aggravated by eating.\n"
-        "- 胃溃疡: 胃壁或十二指肠的侵蚀，导致腹痛，进食时可能加剧。\n"
-        "- Penyakit Ulser Peptik: Hakisan lapisan perut atau duodenum, menyebabkan sakit perut yang boleh bertambah teruk selepas makan.\n\n"
-        "Red Flags:\n"
-        "- [List any urgent symptoms or 'None detected']\n\n"
-        "Additional Notes for Doctor:\n"
-        "[Brief clinical summary in ENGLISH ONLY. Third-person, professional medical language.]\n\n"
-        "Urgency Score: [NUMBER from 1 to 10, based on severity]\n\n"
-        "LANGUAGE INSTRUCTIONS:\n"
-        "- For 'Potential Conditions', ALWAYS provide each condition in three languages: English, Chinese (中文), and Malay (Bahasa Malaysia), without language labels.\n"
-        "- For 'Red Flags', use the same language as the user's input.\n"
-        "- The 'Additional Notes for Doctor' section MUST ALWAYS be in ENGLISH regardless of input language.\n"
-        "- Do not mix languages within a section except for 'Potential Conditions'.\n\n"
-        "CONTENT INSTRUCTIONS:\n"
-        "- Keep explanations brief and professional.\n"
-        "- For each condition, provide a brief scientific rationale.\n"
-        "- Highlight any urgent symptoms requiring immediate attention.\n"
-        "- The urgency score MUST accurately reflect the seriousness of symptoms (10 = life-threatening, 1 = non-urgent).\n"
-        "- Do NOT provide a diagnosis or treatment plan—only a triage assessment.\n"
-    )
-    
-    # Add specific language instruction if provided
-    if language:
-        language_mapping = {
-            'en': 'English',
-            'ms': 'Malay (Bahasa Malaysia)',
-            'zh': 'Chinese',
-            'ta': 'Tamil',
-        }
-        language_name = language_mapping.get(language, language)
-        section_instruction = (
-            f"IMPORTANT: For the 'Red Flags' section, you MUST reply in {language_name}.\n"
-            "For the 'Potential Conditions' section, you MUST provide each condition in three languages: English, Chinese, and Malay, without language labels.\n"
-            "The 'Additional Notes for Doctor' section MUST be in English ONLY.\n"
-            "The section headers themselves should remain in English."
-        )
-        system_prompt = section_instruction + "\n\n" + system_prompt
-        
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": message}
-        ]
-    )
-    return response.choices[0].message.content 
\ No newline at end of file
+def stream_gpt(message, language=None, user_id=None):
+    """Yield the triage reply in chunks as the model generates it."""
+    messages, key = _triage_request('triage', message, language, user_id)
+    return response_cache.stream_through(key, lambda: gateway.stream(messages))
@@ -0,0 +1,276 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from extensions import socketio, user_room
+from services.diagnosis import diagnose
+from services.metrics import counter, gauge, histogram
+from services.red_flags import is_urgent
+
+PRIORITY_NORMAL = 0
+PRIORITY_URGENT = 1
+
+JOBS = counter('diagnosis_jobs_total', 'Diagnosis jobs by final status', ['status', 'priority'])
+REJECTED = counter('diagnosis_jobs_rejected_total', 'Diagnosis jobs refused because the queue was full', ['priority'])
+QUEUE_DEPTH = gauge('diagnosis_queue_depth', 'Diagnosis jobs pending or running in the shared queue, as last read by this process')
+WAIT_SECONDS = histogram('diagnosis_job_wait_seconds', 'Time diagnosis jobs spend queued', ['priority'])
+RUN_SECONDS = histogram('diagnosis_job_run_seconds', 'Time spent running diagnosis jobs', ['priority'])
+
+
+class QueueFull(Exception):
+    """Raised when a job is refused for backpressure; retry_after is a hint in seconds."""
+
+    def __init__(self, depth, retry_after=5):
+        super().__init__(f"Diagnosis queue is full ({depth} jobs waiting)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+def _priority_label(priority):
+    return 'urgent' if priority == PRIORITY_URGENT else 'normal'
+
+
+class JobQueue:
+    """
+    Persistent diagnosis job queue in a local SQLite file, shared by every process on the host.
+
+    Jobs are claimed highest priority first, then in insertion (rowid) order. A claim is a lease: a job
+    whose worker died (crash, restart, deploy) becomes claimable again once the lease
+    expires, up to max_attempts. Pending jobs survive restarts. Finished jobs are kept
+    for result_ttl seconds so clients can poll for them.
+    """
+
+    def __init__(self, path, max_depth=1000, urgent_headroom=100, lease_seconds=300, max_attempts=3,
+                 result_ttl=24 * 3600):
+        self.path = path
+        self.max_depth = max_depth
+        self.urgent_headroom = urgent_headroom
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def _conn(self):
+        # Opened on first use so importing the app doesn't create the queue file
+        if self._connection is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._init_schema(conn)
+            self._connection = conn
+        return self._connection
+
+    @staticmethod
+    def _init_schema(conn):
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS diagnosis_job ('
+            'id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, '
+            'payload TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, '
+            'created_at REAL NOT NULL, started_at REAL, finished_at REAL, lease_until REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_diagnosis_job_claim ON diagnosis_job (status, priority)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_diagnosis_job_finished ON diagnosis_job (finished_at)')
+
+    def depth(self):
+        with self._lock:
+            return self._depth()
+
+    def _depth(self):
+        # Read from the shared table rather than tracked per process, since jobs are
+        # enqueued, claimed and finished by different processes
+        depth = self._conn.execute(
+            "SELECT COUNT(*) FROM diagnosis_job WHERE status IN ('pending', 'running')"
+        ).fetchone()[0]
+        QUEUE_DEPTH.set(depth)
+        return depth
+
+    def enqueue(self, payload, priority=PRIORITY_NORMAL):
+        """Store a job and return its id. Raises QueueFull past max_depth (urgent jobs get extra headroom)."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        limit = self.max_depth + (self.urgent_headroom if priority == PRIORITY_URGENT else 0)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                depth = self._depth()
+                if depth >= limit:
+                    raise QueueFull(depth)
+                self._conn.execute(
+                    "INSERT INTO diagnosis_job (id, status, priority, payload, created_at) "
+                    "VALUES (?, 'pending', ?, ?, ?)",
+                    (job_id, priority, json.dumps(payload, ensure_ascii=False), now)
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            QUEUE_DEPTH.set(depth + 1)
+        return job_id
+
+    def claim(self):
+        """Lease the next runnable job: (id, priority, payload, created_at), or None when the queue is empty."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    "SELECT id, priority, payload, created_at, attempts FROM diagnosis_job "
+                    "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY priority DESC, rowid LIMIT 1", (now,)
+                ).fetchone()
+                if row is not None and row[4] >= self.max_attempts:
+                    # Its worker died max_attempts times; give up instead of taking the queue down with it
+                    self._conn.execute(
+                        "UPDATE diagnosis_job SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL "
+                        "WHERE id = ?", ('Gave up after repeated worker failures', now, row[0])
+                    )
+                    JOBS.inc(status='failed', priority=_priority_label(row[1]))
+                    row = None
+                elif row is not None:
+                    self._conn.execute(
+                        "UPDATE diagnosis_job SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                        "lease_until = ? WHERE id = ?", (now, now + self.lease_seconds, row[0])
+                    )
+                self._depth()
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return None if row is None else (row[0], row[1], json.loads(row[2]), row[3])
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE diagnosis_job SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+                "WHERE id = ?",
+                ('failed' if error is not None else 'done',
+                 None if result is None else json.dumps(result, ensure_ascii=False), error, time.time(), job_id)
+            )
+            self._depth()
+
+    def get(self, job_id):
+        """Public view of a job as a dict, or None if it is unknown or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, status, priority, result, error, created_at, started_at, finished_at '
+                'FROM diagnosis_job WHERE id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = {'id': row[0], 'status': row[1], 'priority': _priority_label(row[2]), 'created_at': row[5],
+               'started_at': row[6], 'finished_at': row[7]}
+        if row[3] is not None:
+            job['result'] = json.loads(row[3])
+        if row[4] is not None:
+            job['error'] = row[4]
+        return job
+
+    def purge(self):
+        """Drop finished jobs older than result_ttl. Returns how many were removed."""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM diagnosis_job WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.result_ttl,)
+            ).rowcount
+
+
+class DiagnosisWorkers:
+    """
+    Fixed pool of worker threads running queued diagnoses.
+
+    The work is almost entirely waiting on the LLM gateway, so threads are enough; the
+    pool size bounds how many diagnoses hold a gateway slot at once. Results are pushed
+    as a `diagnosis_result` Socket.IO event to the user's room and/or the submitting
+    socket, and stay available for polling.
+    """
+
+    def __init__(self, queue, workers=4, idle_poll=1.0):
+        self.queue = queue
+        self.workers = workers
+        self.idle_poll = idle_poll
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._app = None
+
+    def ensure_started(self, app):
+        """Start the pool on first use, in whichever process ends up serving jobs."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._app = app
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'diagnosis-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, app, symptoms, language='en', structured=None, user_id=None, sid=None):
+        """Queue a diagnosis and return (job_id, priority). Raises QueueFull under backpressure."""
+        priority = PRIORITY_URGENT if is_urgent(symptoms) else PRIORITY_NORMAL
+        try:
+            job_id = self.queue.enqueue({'symptoms': symptoms, 'language': language, 'structured': structured,
+                                         'user_id': user_id, 'sid': sid}, priority)
+        except QueueFull:
+            REJECTED.inc(priority=_priority_label(priority))
+            raise
+        self.ensure_started(app)
+        self._wakeup.set()
+        return job_id, _priority_label(priority)
+
+    def _run(self):
+        last_purge = 0.0
+        while True:
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                print(f"Error claiming diagnosis job: {str(e)}")
+                job = None
+            if job is None:
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    self.queue.purge()
+                self._wakeup.wait(self.idle_poll)
+                self._wakeup.clear()
+                continue
+            try:
+                self._execute(*job)
+            except Exception as e:
+                # The lease runs out and the job is retried; keep the worker alive meanwhile
+                print(f"Error finishing diagnosis job {job[0]}: {str(e)}")
+
+    def _execute(self, job_id, priority, payload, created_at):
+        label = _priority_label(priority)
+        started = time.time()
+        WAIT_SECONDS.observe(started - created_at, priority=label)
+        result = error = None
+        try:
+            with self._app.app_context():
+                result = diagnose(payload['symptoms'], language=payload.get('language') or 'en',
+                                  structured=payload.get('structured'), user_id=payload.get('user_id'))
+        except Exception as e:
+            print(f"Error in AI diagnosis job {job_id}: {str(e)}")
+            error = str(e)
+        self.queue.finish(job_id, result=result, error=error)
+        RUN_SECONDS.observe(time.time() - started, priority=label)
+        JOBS.inc(status='failed' if error is not None else 'done', priority=label)
+
+        message = {'job_id': job_id, 'status': 'failed' if error is not None else 'done'}
+        message.update({'error': error} if error is not None else {'result': result})
+        if payload.get('user_id'):
+            socketio.emit('diagnosis_result', message, to=user_room(payload['user_id']))
+        if payload.get('sid'):
+            socketio.emit('diagnosis_result', message, to=payload['sid'])
+
+
+job_queue = JobQueue(
+    os.getenv('DIAGNOSIS_JOB_DB', 'diagnosis_jobs.sqlite3'),
+    max_depth=int(os.getenv('DIAGNOSIS_QUEUE_MAX_DEPTH', '1000')),
+    lease_seconds=int(os.getenv('DIAGNOSIS_JOB_LEASE_SECONDS', '300')),
+)
+diagnosis_workers = DiagnosisWorkers(job_queue, workers=int(os.getenv('DIAGNOSIS_WORKERS', '4')))
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from services.metrics import counter, histogram
+from services.observability import add_request_time
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+TIME_TO_FIRST_TOKEN = histogram(
+    'llm_time_to_first_token_seconds', 'Time from sending a streamed completion to its first token', ['model']
+)
+
+LLM_REQUEST_SECONDS = histogram(
+    'llm_request_duration_seconds', 'Duration of upstream completion calls, streams until their last token',
+    ['model', 'mode']
+)
+LLM_TOKENS = counter('llm_tokens_total', 'Tokens billed for completions', ['model', 'kind'])
+LLM_ERRORS = counter('llm_errors_total', 'Failed upstream completion calls, including retried ones', ['model', 'error'])
+
+_STREAM_DONE = object()
+
+
+def _record_usage(model, usage):
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind='prompt')
+        LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind='completion')
+
+
+class LLMGateway:
+    """
+    Shared OpenAI client for every service module.
+
+    Completions run on a single background event loop with one async client and a
+    bounded connection pool, so request threads only wait on a future instead of each
+    holding its own HTTP connection. Identical in-flight requests are coalesced into
+    one upstream call, failures on 429/5xx are retried with jittered exponential
+    backoff, and a semaphore caps how many completions are in flight at once.
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_connections=20, max_concurrency=16,
+                 timeout=30.0, max_retries=3, backoff_base=0.5, backoff_max=8.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {'requests': 0, 'upstream_calls': 0, 'coalesced': 0, 'retries': 0, 'errors': 0}
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._retryable = ()
+        self._inflight = {}
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                # openai (with httpx and pydantic) takes most of a second to import, so only on first use
+                import httpx
+                import openai
+
+                self._retryable = (openai.RateLimitError, openai.InternalServerError,
+                                   openai.APITimeoutError, openai.APIConnectionError)
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='llm-gateway', daemon=True).start()
+                http_client = openai.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                    timeout=self.timeout,
+                )
+                self._client = openai.AsyncOpenAI(
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                    base_url=self.base_url or os.getenv("OPENAI_BASE_URL"),
+                    http_client=http_client,
+                    max_retries=0,
+                )
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+        return self._loop
+
+    @staticmethod
+    def _request_key(model, messages, kwargs):
+        raw = json.dumps([model, messages, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get('retry-after'))
+            except (TypeError, ValueError):
+                pass
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter so retrying workers don't hit the API in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _create(self, model, messages, timeout, kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    self.stats['upstream_calls'] += 1
+                    started = time.perf_counter()
+                    response = await self._client.chat.completions.create(
+                        model=model, messages=messages, timeout=timeout, **kwargs
+                    )
+                    LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model, mode='complete')
+                    _record_usage(model, response.usage)
+                    return response
+            except self._retryable as e:
+                LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                if attempt == self.max_retries:
+                    self.stats['errors'] += 1
+                    raise
+                self.stats['retries'] += 1
+                await asyncio.sleep(self._backoff(attempt, e))
+            except Exception as e:
+                LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                self.stats['errors'] += 1
+                raise
+
+    async def acomplete(self, messages, model=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Return the completion text. Must be awaited on the gateway loop."""
+        self.stats['requests'] += 1
+        key = self._request_key(model, messages, kwargs)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create(model, messages, timeout or self.timeout, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+        response = await asyncio.shield(task)
+        return response.choices[0].message.content
+
+    async def astream(self, messages, model=DEFAULT_MODEL, timeout=None, **kwargs):
+        """
+        Yield completion text deltas as they arrive. Must be iterated on the gateway loop.
+        Retries only happen before the stream opens, never after tokens were yielded.
+        """
+        self.stats['requests'] += 1
+        started = time.perf_counter()
+        # The last chunk then carries the token usage
+        kwargs = {'stream_options': {'include_usage': True}, **kwargs}
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                try:
+                    self.stats['upstream_calls'] += 1
+                    stream = await self._client.chat.completions.create(
+                        model=model, messages=messages, timeout=timeout or self.timeout, stream=True, **kwargs
+                    )
+                except self._retryable as e:
+                    LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                    if attempt == self.max_retries:
+                        self.stats['errors'] += 1
+                        raise
+                    self.stats['retries'] += 1
+                    delay = self._backoff(attempt, e)
+                except Exception as e:
+                    LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                    raise
+                else:
+                    first = True
+                    try:
+                        async for chunk in stream:
+                            _record_usage(model, chunk.usage)
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                if first:
+                                    TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, model=model)
+                                    first = False
+                                yield delta
+                    except Exception as e:
+                        LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                        raise
+                    LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model, mode='stream')
+                    return
+            await asyncio.sleep(delay)
+
+    def stream(self, messages, model=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Blocking iterator over completion deltas for sync callers."""
+        loop = self._ensure_started()
+        deltas = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.astream(messages, model=model, timeout=timeout, **kwargs):
+                    deltas.put(delta)
+            except Exception as e:
+                deltas.put(e)
+            finally:
+                deltas.put(_STREAM_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        waited = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                item = deltas.get(timeout=timeout or self.timeout)
+                waited += time.perf_counter() - started
+                if item is _STREAM_DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stop the upstream stream if the caller went away early
+            future.cancel()
+            add_request_time('llm', waited)
+
+    def submit(self, messages, model=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Schedule a completion from any thread and return a concurrent.futures.Future."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self.acomplete(messages, model=model, timeout=timeout, **kwargs), loop
+        )
+
+    def complete(self, messages, model=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Blocking helper for sync callers such as Flask views."""
+        started = time.perf_counter()
+        try:
+            return self.submit(messages, model=model, timeout=timeout, **kwargs).result()
+        finally:
+            add_request_time('llm', time.perf_counter() - started)
+
+
+gateway = LLMGateway(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+    timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+)
@@ -1,12 +1,46 @@
-from data.faq_data import faq_data
-
-def answer_question(user_question):
-    user_q = user_question.lower()
-    for item in faq_data:
-        if item['q'].lower() in user_q or user_q in item['q'].lower():
-            return item['a']
-    # Keyword match
-    for item in faq_data:
-        if any(word in user_q for word in item['q'].lower().split()):
-            return item['a']
-    return "I'm sorry, I don't have an answer for that. Please consult a doctor on our platform." 
\ No newline at end of file
+import os
+from collections import namedtuple
+from services.faq_index import faq_repository
+from services.patient_context import patient_context
+from services.red_flags import is_urgent
+
+FALLBACK_ANSWER = "I'm sorry, I don't have an answer for that. Please consult a doctor on our platform."
+
+# Keyword matches below this confidence go to the LLM: a word or two in common with a FAQ question
+# (e.g. "drink water" in a question about surgery) is not enough to send its answer
+FAQ_ANSWER_CONFIDENCE = float(os.getenv('FAQ_ANSWER_CONFIDENCE', '0.6'))
+
+LocalAnswer = namedtuple('LocalAnswer', ['answer', 'source', 'score'])
+
+def search_faq(user_question, top_k=5, min_confidence=None):
+    return faq_repository.index().search(user_question, top_k=top_k, min_confidence=min_confidence)
+
+def answer_locally(user_question, language=None):
+    """
+    Answer without the LLM when possible: the closest question in the semantic index (FAQ entries and earlier
+    answers) if it is similar enough, else a keyword FAQ match. Returns a LocalAnswer, or None to ask the LLM.
+    Urgent symptoms always go to the LLM for its urgent-care guidance, never to a canned answer.
+    """
+    if is_urgent(user_question):
+        return None
+    # Imported here so the semantic index is only loaded with the first chat message
+    from services.semantic_index import semantic_matcher
+    match = semantic_matcher.match(user_question, language=language)
+    if match:
+        return LocalAnswer(match.entry['a'], 'semantic', match.score)
+    matches = search_faq(user_question, top_k=1, min_confidence=FAQ_ANSWER_CONFIDENCE)
+    if matches:
+        return LocalAnswer(matches[0].entry['a'], 'faq', matches[0].confidence)
+    return None
+
+def is_personalized(user_id):
+    """Whether replies for user_id are personalized with their records, and so not reusable for anyone else."""
+    patient = patient_context.get(user_id)
+    return bool(patient and patient.text)
+
+def remember_answer(user_question, answer, language=None):
+    """Store an LLM answer for semantic matching. Only for replies that don't depend on the patient."""
+    if is_urgent(user_question) or is_urgent(answer):
+        return
+    from services.semantic_index import semantic_matcher
+    semantic_matcher.learn(user_question, answer, language=language)
@@ -0,0 +1,206 @@
+import functools
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter as Tally
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.metrics import histogram
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+DB_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+REQUEST_SECONDS = histogram(
+    'http_request_duration_seconds', 'Time to serve an HTTP request, streamed bodies included',
+    ['method', 'route', 'status']
+)
+REQUEST_QUERIES = histogram(
+    'http_request_db_queries', 'Database queries issued per HTTP request', ['method', 'route'],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_COMPONENT_SECONDS = histogram(
+    'http_request_component_seconds', 'Time an HTTP request spent on the database, the LLM or parsing replies',
+    ['route', 'component']
+)
+QUERY_SECONDS = histogram('db_query_duration_seconds', 'Duration of single database statements', ['operation'])
+SOCKET_EVENT_SECONDS = histogram('socketio_event_duration_seconds', 'Time spent in Socket.IO event handlers', ['event'])
+
+
+def add_request_time(component, seconds):
+    """Charge time to the current HTTP request's breakdown. No-op outside requests (jobs, dispatcher, sockets)."""
+    if has_app_context():
+        state = g.get('_observed')
+        if state is not None:
+            state['components'][component] = state['components'].get(component, 0.0) + seconds
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    operation = statement.lstrip()[:6].upper()
+    QUERY_SECONDS.observe(elapsed, operation=operation if operation in DB_OPERATIONS else 'OTHER')
+    if has_app_context():
+        state = g.get('_observed')
+        if state is not None:
+            state['queries'] += 1
+            state['components']['db'] = state['components'].get('db', 0.0) + elapsed
+
+
+def _threads_are_greenlets():
+    gevent_monkey = sys.modules.get('gevent.monkey')
+    return bool(gevent_monkey and gevent_monkey.is_module_patched('threading'))
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for slow requests.
+
+    A background thread samples the stack of every thread serving a request each
+    interval_ms. When a request takes threshold_ms or longer its samples are written to
+    `directory` as collapsed stacks ("frame;frame;frame count" per line), the input of
+    flamegraph.pl and speedscope; faster requests are discarded. Sampling reads real
+    threads, so it stays off when gevent has patched threading.
+    """
+
+    def __init__(self, threshold_ms, interval_ms=5, directory=None):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'doccare-profiles')
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Begin sampling the calling thread; returns a token for finish()."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._samples[ident] = Tally()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return ident
+
+    def finish(self, ident, seconds, label):
+        """Stop sampling and return the path of the written profile, or None when the request was fast."""
+        with self._lock:
+            samples = self._samples.pop(ident, None)
+        if not samples or seconds < self.threshold:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}-{seconds * 1000:.0f}ms.folded"
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._samples.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+def _profiler_from_env():
+    threshold = os.getenv('PROFILE_SLOW_REQUESTS_MS')
+    if not threshold:
+        return None
+    if _threads_are_greenlets():
+        print("Slow request profiler disabled: it cannot sample gevent greenlets")
+        return None
+    return SlowRequestProfiler(float(threshold), interval_ms=float(os.getenv('PROFILE_INTERVAL_MS', '5')),
+                               directory=os.getenv('PROFILE_DIR') or None)
+
+
+def _start_request():
+    g._observed = {'started': time.perf_counter(), 'queries': 0, 'components': {}, 'profile': None}
+    if profiler is not None:
+        g._observed['profile'] = profiler.start()
+
+
+def _finish_request(response):
+    state = g.get('_observed')
+    if state is None:
+        return response
+    state['status'] = response.status_code
+    if response.is_streamed:
+        # Time streamed (SSE) responses to their last event, once the server closes them
+        state['streamed'] = True
+        method, route, status = request.method, _route(), response.status_code
+        response.call_on_close(lambda: _record_request(state, method, route, status))
+    return response
+
+
+def _teardown_request(exc):
+    # Runs for every request, also when a view raised and after_request handlers were skipped
+    state = g.get('_observed')
+    if state is None or (exc is None and state.get('streamed')):
+        return
+    _record_request(state, request.method, _route(), 500 if exc is not None else state.get('status', 500))
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _record_request(state, method, route, status):
+    if state.get('recorded'):
+        return
+    state['recorded'] = True
+    elapsed = time.perf_counter() - state['started']
+    REQUEST_SECONDS.observe(elapsed, method=method, route=route, status=status)
+    REQUEST_QUERIES.observe(state['queries'], method=method, route=route)
+    for component, seconds in state['components'].items():
+        REQUEST_COMPONENT_SECONDS.observe(seconds, route=route, component=component)
+    if state['profile'] is not None:
+        path = profiler.finish(state['profile'], elapsed, f"{method} {route}")
+        if path:
+            print(f"Slow request {method} {route} took {elapsed * 1000:.0f} ms, profile written to {path}")
+
+
+def timed_socket_event(name):
+    """Record a Socket.IO handler's run time under `name`; put it below @socketio.on."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                SOCKET_EVENT_SECONDS.observe(time.perf_counter() - started, event=name)
+        return wrapper
+    return decorator
+
+
+def instrument_app(app):
+    """Time every request on `app`, with its database queries and LLM and parsing time."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+
+
+profiler = _profiler_from_env()
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date
+
+from sqlalchemy import or_
+
+from extensions import db
+from models.chronic import ChronicCondition
+from models.reminder import MedicationReminder
+from services.metrics import counter, gauge
+from services.state_sync import state_bus
+
+MAX_ITEMS = 20
+MAX_NOTES_CHARS = 80
+
+LOOKUPS = counter('patient_context_lookups_total', 'Patient context snapshot lookups by cache result', ['result'])
+INVALIDATIONS = counter('patient_context_invalidations_total', 'Patient context snapshots dropped after a write')
+CACHED_USERS = gauge('patient_context_cached_users', 'Users with a cached patient context snapshot')
+
+# text is what goes to the model; digest identifies it in response cache keys
+PatientSnapshot = namedtuple('PatientSnapshot', ['user_id', 'day', 'text', 'digest'])
+
+
+def _user_key(user_id):
+    return str(user_id)
+
+
+def _line(label, values):
+    if not values:
+        return None
+    more = "; and others" if len(values) > MAX_ITEMS else ""
+    return f"- {label}: " + "; ".join(values[:MAX_ITEMS]) + more
+
+
+def build_snapshot(user_id, today=None):
+    """Compact description of a user's chronic conditions and current medications. Two indexed queries."""
+    today = today or date.today()
+    conditions = []
+    for condition, notes in db.session.query(ChronicCondition.condition, ChronicCondition.notes).filter(
+        ChronicCondition.user_id == user_id
+    ).order_by(ChronicCondition.id).limit(MAX_ITEMS + 1):
+        notes = (notes or '').strip()
+        if len(notes) > MAX_NOTES_CHARS:
+            notes = notes[:MAX_NOTES_CHARS].rstrip() + '...'
+        conditions.append(f"{condition} ({notes})" if notes else condition)
+    medications = []
+    for medication, dosage, frequency in db.session.query(
+        MedicationReminder.medication, MedicationReminder.dosage, MedicationReminder.frequency
+    ).filter(
+        MedicationReminder.user_id == user_id,
+        or_(MedicationReminder.end_date.is_(None), MedicationReminder.end_date >= today),
+        MedicationReminder.start_date <= today,
+    ).order_by(MedicationReminder.id).limit(MAX_ITEMS + 1):
+        medications.append(' '.join(part for part in (medication, dosage, frequency) if part))
+
+    lines = [line for line in (_line('Chronic conditions', conditions), _line('Current medications', medications)) if line]
+    if not lines:
+        return PatientSnapshot(user_id, today, '', '')
+    text = "Patient records (use them to tailor the answer; do not repeat them back):\n" + "\n".join(lines)
+    return PatientSnapshot(user_id, today, text, hashlib.sha256(text.encode('utf-8')).hexdigest()[:16])
+
+
+class PatientContextCache:
+    """
+    LRU of per-user snapshots, so personalizing a chat turn costs no queries on a hit.
+
+    Write routes call invalidate() after committing, which also drops the snapshots in the
+    other backend processes (see state_sync). Snapshots also expire at midnight
+    because "current medications" depends on the date. Users without any records are
+    cached as an empty snapshot too.
+    """
+
+    def __init__(self, max_users=10_000):
+        self.max_users = max_users
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+        self._data = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """The user's snapshot, built on a miss (needs an app context). None without a user_id."""
+        if user_id in (None, ''):
+            return None
+        key = _user_key(user_id)
+        today = date.today()
+        with self._lock:
+            snapshot = self._data.get(key)
+            if snapshot is not None and snapshot.day == today:
+                self._data.move_to_end(key)
+                self.stats['hits'] += 1
+                LOOKUPS.inc(result='hit')
+                return snapshot
+            generation = self._generation
+        self.stats['misses'] += 1
+        LOOKUPS.inc(result='miss')
+        snapshot = build_snapshot(user_id, today)
+        with self._lock:
+            if generation != self._generation:
+                # A write landed while this was being built; serve it but don't cache what may be stale
+                return snapshot
+            self._data[key] = snapshot
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_users:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+            CACHED_USERS.set(len(self._data))
+        return snapshot
+
+    def invalidate(self, *user_ids):
+        """Drop the users' snapshots in this process and in the other backend processes."""
+        self.forget(*user_ids)
+        state_bus.publish('patients', user_ids=[_user_key(user_id) for user_id in user_ids])
+
+    def forget(self, *user_ids):
+        """Drop the users' snapshots in this process only."""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                if self._data.pop(_user_key(user_id), None) is not None:
+                    self.stats['invalidations'] += 1
+                    INVALIDATIONS.inc()
+            CACHED_USERS.set(len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            CACHED_USERS.set(0)
+
+
+patient_context = PatientContextCache(max_users=int(os.getenv('PATIENT_CONTEXT_MAX_USERS', '10000')))
+state_bus.subscribe('patients', lambda message: patient_context.forget(*message['user_ids']))
+state_bus.on_reconnect(patient_context.clear)
@@ -0,0 +1,209 @@
+from collections import namedtuple
+
+from services.metrics import gauge
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts fall back to an estimate
+    tiktoken = None
+
+# Language codes sent by the frontend
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'ms': 'Malay (Bahasa Malaysia)',
+    'zh': 'Chinese',
+    'ta': 'Tamil',
+}
+
+PROMPT_TOKENS = gauge(
+    'llm_prompt_template_tokens', 'Token count of each precompiled system prompt variant',
+    ['prompt', 'version', 'language', 'part']
+)
+
+
+class _Versioned:
+    """Templates and their compiled variants are both identified by name and version."""
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Identifies the prompt text in response cache keys, e.g. "triage:v2"."""
+        return f"{self.name}:{self.version}"
+
+
+class CompiledPrompt(_Versioned, namedtuple('CompiledPrompt', ['name', 'version', 'language', 'text', 'tokens', 'prefix_tokens'])):
+    __slots__ = ()
+
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Token count with the gpt-4o tokenizer when tiktoken is installed, otherwise a rough estimate."""
+    global _encoding
+    if tiktoken is not None:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding('o200k_base')
+            return len(_encoding.encode(text))
+        except Exception:
+            pass
+    # About 4 bytes per token for Latin text; CJK characters are roughly one token each
+    return sum(1 if ord(ch) > 0x2E80 else 0 for ch in text) + len(text.encode('ascii', 'ignore')) // 4
+
+
+class PromptTemplate(_Versioned):
+    """
+    A system prompt made of a static prefix followed by an optional per-language suffix.
+
+    Keeping everything language specific at the end means every variant of a prompt
+    shares the same leading tokens, which is what provider-side prompt caching keys on.
+    Bump the version whenever the text changes so cached replies and analytics stay separate.
+    """
+
+    def __init__(self, name, version, prefix, language_suffix=None):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.language_suffix = language_suffix
+
+    def render(self, language=None):
+        if not language or self.language_suffix is None:
+            return self.prefix
+        return self.prefix + "\n\n" + self.language_suffix(LANGUAGE_NAMES.get(language, language))
+
+
+class PromptRegistry:
+    """Builds every (prompt, language) variant once and serves the precompiled text."""
+
+    def __init__(self, languages=tuple(LANGUAGE_NAMES)):
+        self.languages = tuple(languages)
+        self._templates = {}
+        self._compiled = {}
+
+    def register(self, template):
+        self._templates[template.name] = template
+        for language in (None,) + self.languages:
+            self._compile(template, language)
+        return template
+
+    def template(self, name):
+        return self._templates[name]
+
+    def get(self, name, language=None):
+        """The precompiled variant; language codes outside the supported set get the language-less prompt."""
+        return self._compiled[(name, self.supported(language))]
+
+    def supported(self, language):
+        """The language code if it has its own variant, else None."""
+        return language if language in self.languages else None
+
+    def variants(self):
+        return list(self._compiled.values())
+
+    def messages(self, name, user_message, language=None, context=None):
+        """
+        Chat messages for a prompt variant. Per-user context goes in a second system
+        message so the precompiled prompt stays an identical, cacheable prefix.
+        """
+        prompt = self.get(name, language)
+        messages = [{"role": "system", "content": prompt.text}]
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": user_message})
+        return prompt, messages
+
+    def _compile(self, template, language):
+        text = template.render(language)
+        prefix_tokens = count_tokens(template.prefix)
+        compiled = CompiledPrompt(template.name, template.version, language, text, count_tokens(text), prefix_tokens)
+        self._compiled[(template.name, language)] = compiled
+        labels = {'prompt': template.name, 'version': template.version, 'language': language or ''}
+        PROMPT_TOKENS.set(compiled.tokens, part='total', **labels)
+        PROMPT_TOKENS.set(prefix_tokens, part='shared_prefix', **labels)
+        return compiled
+
+
+TRIAGE_PROMPT = (
+    "You are a professional, concise, and highly knowledgeable medical triage assistant. "
+    "Your job is to analyze the symptoms described by the user and provide a structured, clear, and medically accurate triage summary.\n\n"
+    "IMPORTANT: FOLLOW THIS FORMAT EXACTLY, WITH THESE EXACT SECTION HEADERS:\n\n"
+    "Potential Conditions:\n"
+    "- Gastroenteritis: Inflammation of the gastrointestinal tract, most commonly due to a viral or bacterial infection, causing abdominal pain.\n"
+    "- 胃肠炎: 胃肠道的炎症，通常由病毒或细菌感染引起，导致腹痛。\n"
+    "- Gastroenteritis: Keradangan saluran gastrousus, paling sering disebabkan oleh jangkitan virus atau bakteria, menyebabkan kesakitan abdomen.\n"
+    "- Peptic Ulcer Disease: Erosion of the stomach lining or duodenum, leading to abdominal pain that can be aggravated by eating.\n"
+    "- 胃溃疡: 胃壁或十二指肠的侵蚀，导致腹痛，进食时可能加剧。\n"
+    "- Penyakit Ulser Peptik: Hakisan lapisan perut atau duodenum, menyebabkan sakit perut yang boleh bertambah teruk selepas makan.\n\n"
+    "Red Flags:\n"
+    "- [List any urgent symptoms or 'None detected']\n\n"
+    "Additional Notes for Doctor:\n"
+    "[Brief clinical summary in ENGLISH ONLY. Third-person, professional medical language.]\n\n"
+    "Urgency Score: [NUMBER from 1 to 10, based on severity]\n\n"
+    "LANGUAGE INSTRUCTIONS:\n"
+    "- For 'Potential Conditions', ALWAYS provide each condition in three languages: English, Chinese (中文), and Malay (Bahasa Malaysia), without language labels.\n"
+    "- For 'Red Flags', use the same language as the user's input.\n"
+    "- The 'Additional Notes for Doctor' section MUST ALWAYS be in ENGLISH regardless of input language.\n"
+    "- Do not mix languages within a section except for 'Potential Conditions'.\n\n"
+    "CONTENT INSTRUCTIONS:\n"
+    "- Keep explanations brief and professional.\n"
+    "- For each condition, provide a brief scientific rationale.\n"
+    "- Highlight any urgent symptoms requiring immediate attention.\n"
+    "- The urgency score MUST accurately reflect the seriousness of symptoms (10 = life-threatening, 1 = non-urgent).\n"
+    "- Do NOT provide a diagnosis or treatment plan—only a triage assessment.\n"
+)
+
+TRIAGE_STRUCTURED_OUTPUT = (
+    "OUTPUT FORMAT OVERRIDE: Do not write the section headers above. Return ONLY a JSON object with these keys:\n"
+    "- possibleConditions: array of strings, one per condition line, each 'Condition: rationale', following the language instructions for 'Potential Conditions'.\n"
+    "- redFlags: array of strings following the language instructions for 'Red Flags' (empty array if none).\n"
+    "- notes: string with the 'Additional Notes for Doctor' content, in English only.\n"
+    "- urgencyScore: integer from 1 to 10.\n"
+)
+
+
+def _triage_language_suffix(language_name):
+    return (
+        f"IMPORTANT: For the 'Red Flags' section, you MUST reply in {language_name}.\n"
+        "For the 'Potential Conditions' section, you MUST provide each condition in three languages: English, Chinese, and Malay, without language labels.\n"
+        "The 'Additional Notes for Doctor' section MUST be in English ONLY.\n"
+        "The section headers themselves should remain in English."
+    )
+
+
+ASSISTANT_PROMPT = (
+    "Limit your response to 4 sentences or less. Do not provide long explanations. "
+    "Respond in a polite and supportive way. "
+    "If the user's language is Malay, always reply in Bahasa Malaysia (Malaysian Malay), not Indonesian. "
+    "You are MY-Care, a professional, friendly, and highly knowledgeable virtual health assistant. "
+    "Your job is to help users understand their symptoms, answer general health questions, and provide guidance on when to seek medical care. "
+    "You are not a doctor and do not provide diagnoses or treatment plans. "
+    "Always reply in the same language as the user's input, no matter what language the user uses. "
+    "Always encourage users to consult a qualified healthcare professional for any urgent or serious concerns.\n"
+    "Instructions:\n"
+    "- Answer questions clearly, briefly, and in a supportive, conversational tone.\n"
+    "- Keep your replies concise and avoid long-winded explanations.\n"
+    "- If a user describes symptoms, provide general information about possible causes, but do NOT make a diagnosis.\n"
+    "- If symptoms are severe, worsening, or involve red flags (e.g., chest pain, difficulty breathing, severe headache, confusion, persistent vomiting, bleeding, loss of consciousness), advise the user to seek immediate medical attention.\n"
+    "- If the user asks about medications, provide general information and remind them to consult a doctor or pharmacist before starting or stopping any medication.\n"
+    "- If the user asks for a diagnosis or treatment, politely explain that you cannot provide a diagnosis or prescribe treatment, and recommend seeing a healthcare professional.\n"
+    "- If the user asks about mental health, respond with empathy and encourage seeking support from professionals or trusted individuals.\n"
+    "- If you do not know the answer, say so honestly and suggest consulting a healthcare provider.\n"
+    "Format:\n"
+    "- Use short paragraphs and bullet points if helpful.\n"
+    "- Be polite, professional, and supportive at all times.\n"
+    "- Never provide false reassurance or medical advice beyond your scope.\n"
+    "If the user's message is not health-related, politely redirect them to health topics."
+)
+
+
+def _assistant_language_suffix(language_name):
+    return f"Reply in {language_name}."
+
+
+prompts = PromptRegistry()
+prompts.register(PromptTemplate('triage', 'v2', TRIAGE_PROMPT, _triage_language_suffix))
+prompts.register(PromptTemplate(
+    'triage_structured', 'v2', TRIAGE_PROMPT + "\n" + TRIAGE_STRUCTURED_OUTPUT, _triage_language_suffix
+))
+prompts.register(PromptTemplate('assistant', 'v2', ASSISTANT_PROMPT, _assistant_language_suffix))
@@ -0,0 +1,15 @@
+import re
+
+# Red flags from the assistant prompt, plus the most common ways they are typed in Malay and Chinese
+URGENT_PATTERN = re.compile(
+    r"chest pain|can'?t breathe|difficulty breathing|shortness of breath|unconscious|loss of consciousness|"
+    r"faint|seizure|stroke|severe (headache|bleeding|pain)|bleeding heavily|vomiting blood|suicid|overdose|"
+    r"sakit dada|sesak nafas|pengsan|sawan|pendarahan|"
+    r"胸痛|呼吸困难|昏迷|晕倒|抽搐|大出血|自杀",
+    re.IGNORECASE,
+)
+
+
+def is_urgent(text):
+    """Whether the text mentions a symptom that needs urgent care."""
+    return bool(URGENT_PATTERN.search(text or ''))
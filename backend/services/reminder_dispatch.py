@@ -0,0 +1,130 @@
+from datetime import date, datetime
+
+from sqlalchemy import or_
+
+from extensions import db, socketio, user_room
+from models.reminder import MedicationReminder
+from services.bulk import chunked
+from services.reminder_scheduler import reminder_scheduler
+from services.state_sync import state_bus
+
+DISPATCH_INTERVAL = 1.0
+
+# Set in the one process that runs the dispatcher; the others never drain a schedule, so they don't keep one
+_dispatching = False
+
+
+def schedule_reminder(reminder):
+    """
+    Add or refresh a reminder in the scheduler after it was committed. Only the process running
+    the dispatcher keeps a schedule; the others tell it over the state bus, and it reloads the reminder.
+    """
+    if _dispatching:
+        reminder_scheduler.upsert(
+            reminder.id, reminder.user_id, reminder.start_date, reminder.end_date, reminder.times, reminder.snoozed_until
+        )
+    state_bus.publish('reminders', ids=[reminder.id], removed=[])
+
+
+def unschedule_reminder(reminder_id):
+    """Drop a deleted reminder from the dispatcher's schedule."""
+    if _dispatching:
+        reminder_scheduler.remove(reminder_id)
+    state_bus.publish('reminders', ids=[], removed=[reminder_id])
+
+
+def snooze_scheduled(reminder, until):
+    """Apply a committed snooze (reminder.snoozed_until) to the dispatcher's schedule."""
+    if _dispatching and reminder_scheduler.snooze(reminder.id, until) is None:
+        schedule_reminder(reminder)
+    else:
+        state_bus.publish('reminders', ids=[reminder.id], removed=[])
+
+
+def _schedule_query():
+    return db.session.query(
+        MedicationReminder.id, MedicationReminder.user_id, MedicationReminder.start_date,
+        MedicationReminder.end_date, MedicationReminder.times, MedicationReminder.snoozed_until
+    )
+
+
+def load_active_reminders(scheduler=reminder_scheduler, batch_size=10_000):
+    """
+    Fill the scheduler with every reminder that has not ended, dropping any it holds that are
+    gone or ended. Needs an app context.
+    """
+    query = _schedule_query().filter(
+        or_(MedicationReminder.end_date.is_(None), MedicationReminder.end_date >= date.today())
+    ).execution_options(yield_per=batch_size)
+    loaded = set()
+    for row in query:
+        scheduler.upsert(*row)
+        loaded.add(row[0])
+    for reminder_id in set(scheduler.ids()) - loaded:
+        scheduler.remove(reminder_id)
+    return len(loaded)
+
+
+def _reload_reminders(reminder_ids, removed_ids, scheduler, batch_size=1000):
+    for reminder_id in removed_ids:
+        scheduler.remove(reminder_id)
+    for batch in chunked(reminder_ids, batch_size):
+        for row in _schedule_query().filter(MedicationReminder.id.in_(batch)):
+            scheduler.upsert(*row)
+
+
+def reschedule_reminders(reminder_ids, removed_ids=(), scheduler=reminder_scheduler, batch_size=1000):
+    """Sync the dispatcher's schedule with committed bulk writes: reload the written reminders, drop the deleted ones."""
+    reminder_ids, removed_ids = list(reminder_ids), list(removed_ids)
+    if _dispatching:
+        _reload_reminders(reminder_ids, removed_ids, scheduler, batch_size)
+    state_bus.publish('reminders', ids=reminder_ids, removed=removed_ids)
+
+
+def dispatch_due(scheduler=reminder_scheduler, now=None):
+    """Push every due reminder to its user's room as a `reminder_due` event."""
+    due = scheduler.tick(now)
+    for reminder_id, user_id, fire, snoozed in due:
+        socketio.emit('reminder_due', {
+            'reminder_id': reminder_id,
+            'scheduled_at': datetime.fromtimestamp(fire).isoformat(timespec='minutes'),
+            'snoozed': snoozed,
+        }, to=user_room(user_id))
+    return len(due)
+
+
+def run_dispatcher(app, scheduler=reminder_scheduler, interval=DISPATCH_INTERVAL):
+    with app.app_context():
+        count = load_active_reminders(scheduler)
+        db.session.remove()
+    print(f"Reminder dispatcher scheduled {count} active reminders.")
+    while True:
+        try:
+            dispatch_due(scheduler)
+        except Exception as e:
+            print(f"Error dispatching reminders: {str(e)}")
+        socketio.sleep(interval)
+
+
+def _follow_other_processes(app, scheduler):
+    """Apply the reminder writes served by the other backend processes, which publish them on the state bus."""
+    def reload(message):
+        with app.app_context():
+            _reload_reminders(message['ids'], message['removed'], scheduler)
+            db.session.remove()
+
+    def reload_all():
+        with app.app_context():
+            load_active_reminders(scheduler)
+            db.session.remove()
+
+    state_bus.subscribe('reminders', reload)
+    state_bus.on_reconnect(reload_all)
+
+
+def start_dispatcher(app):
+    """Run the dispatcher as a Socket.IO background task. Start it in one process only."""
+    global _dispatching
+    _dispatching = True
+    _follow_other_processes(app, reminder_scheduler)
+    return socketio.start_background_task(run_dispatcher, app)
@@ -0,0 +1,153 @@
+import heapq
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+
+def _slot_minutes(times):
+    """Sorted minutes-after-midnight for "HH:MM" strings, skipping anything unparseable."""
+    slots = set()
+    for value in times or []:
+        try:
+            hours, minutes = str(value).split(':')[:2]
+            slot = int(hours) * 60 + int(minutes)
+        except ValueError:
+            continue
+        if 0 <= slot < 24 * 60:
+            slots.add(slot)
+    return tuple(sorted(slots))
+
+
+class _Entry:
+    __slots__ = ('user_id', 'start', 'end', 'slots', 'snoozed_until', 'generation')
+
+    def __init__(self, user_id, start, end, slots, snoozed_until, generation):
+        self.user_id = user_id
+        self.start = start
+        self.end = end
+        self.slots = slots
+        self.snoozed_until = snoozed_until
+        self.generation = generation
+
+
+class ReminderScheduler:
+    """
+    In-memory schedule of when each active reminder fires next.
+
+    Every reminder has a single entry in a min-heap keyed by its next fire time
+    (epoch seconds, server local time), so memory is one heap item per reminder
+    and a tick only touches reminders that are actually due. Updates bump a
+    generation counter instead of searching the heap; stale heap items are
+    skipped when popped and compacted away once they outnumber live ones.
+    """
+
+    def __init__(self, clock=time.time, max_per_tick=10_000):
+        self.clock = clock
+        self.max_per_tick = max_per_tick
+        self._heap = []
+        self._entries = {}
+        self._generation = 0
+        self._midnights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _midnight(self, day):
+        ts = self._midnights.get(day)
+        if ts is None:
+            ts = self._midnights[day] = datetime.combine(day, datetime.min.time()).timestamp()
+        return ts
+
+    def _next_fire(self, entry, after):
+        """First slot or snooze strictly after the given epoch time, or None once the reminder has ended."""
+        candidate = None
+        if entry.slots:
+            day = max(date.fromtimestamp(after), entry.start)
+            # Slots repeat daily, so the next one is at most a day past the first candidate day
+            for _ in range(2):
+                if entry.end is not None and day > entry.end:
+                    break
+                midnight = self._midnight(day)
+                for slot in entry.slots:
+                    fire = midnight + slot * 60
+                    if fire > after:
+                        candidate = fire
+                        break
+                if candidate is not None:
+                    break
+                day += timedelta(days=1)
+        if entry.snoozed_until is not None and entry.snoozed_until > after:
+            if candidate is None or entry.snoozed_until < candidate:
+                candidate = entry.snoozed_until
+        return candidate
+
+    def _schedule(self, reminder_id, entry, after):
+        fire = self._next_fire(entry, after)
+        if fire is None:
+            self._entries.pop(reminder_id, None)
+            return None
+        heapq.heappush(self._heap, (fire, entry.generation, reminder_id))
+        return fire
+
+    def upsert(self, reminder_id, user_id, start_date, end_date, times, snoozed_until=None):
+        """Add or replace a reminder. Returns its next fire time, or None if it will never fire."""
+        with self._lock:
+            self._generation += 1
+            snooze_ts = snoozed_until.timestamp() if isinstance(snoozed_until, datetime) else snoozed_until
+            entry = _Entry(user_id, start_date, end_date, _slot_minutes(times), snooze_ts, self._generation)
+            self._entries[reminder_id] = entry
+            fire = self._schedule(reminder_id, entry, self.clock())
+            self._maybe_compact()
+            return fire
+
+    def ids(self):
+        with self._lock:
+            return list(self._entries)
+
+    def remove(self, reminder_id):
+        with self._lock:
+            self._entries.pop(reminder_id, None)
+            self._maybe_compact()
+
+    def snooze(self, reminder_id, until):
+        """Fire the reminder again at `until` (datetime or epoch seconds) in addition to its regular slots."""
+        with self._lock:
+            entry = self._entries.get(reminder_id)
+            if entry is None:
+                return None
+            self._generation += 1
+            entry.generation = self._generation
+            entry.snoozed_until = until.timestamp() if isinstance(until, datetime) else until
+            return self._schedule(reminder_id, entry, self.clock())
+
+    def tick(self, now=None):
+        """
+        Pop up to max_per_tick due reminders and reschedule them.
+        Returns [(reminder_id, user_id, fire_ts, snoozed)]; anything beyond the cap is left for the next tick.
+        """
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now and len(due) < self.max_per_tick:
+                fire, generation, reminder_id = heapq.heappop(heap)
+                entry = self._entries.get(reminder_id)
+                if entry is None or entry.generation != generation:
+                    continue
+                snoozed = entry.snoozed_until is not None and fire == entry.snoozed_until
+                if snoozed:
+                    entry.snoozed_until = None
+                due.append((reminder_id, entry.user_id, fire, snoozed))
+                # Missed slots (e.g. after a long pause) collapse into this one firing
+                self._schedule(reminder_id, entry, max(fire, now))
+        return due
+
+    def _maybe_compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            live = self._entries
+            self._heap = [item for item in self._heap if item[2] in live and live[item[2]].generation == item[1]]
+            heapq.heapify(self._heap)
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from services.faq_index import normalize
+from services.metrics import counter
+
+LOOKUPS = counter('response_cache_lookups_total', 'LLM response cache lookups by prompt and result', ['namespace', 'result'])
+EVICTIONS = counter('response_cache_evictions_total', 'LLM replies evicted to keep the response cache under its size limit')
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """Store value and return the number of entries evicted to make room."""
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """
+    Store shared by every process on the host, backed by a local SQLite file.
+    LRU order is tracked with an accessed_at column. Counting the rows is a full scan, so the
+    size is only checked every trim_every writes per process; the table can exceed max_entries
+    by that many writes per process in between.
+    """
+
+    def __init__(self, path, max_entries=100_000, trim_every=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.trim_every = trim_every or max(1, max_entries // 100)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS response_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_accessed ON response_cache (accessed_at)')
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                return None
+            self._conn.execute('UPDATE response_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes < self.trim_every:
+                return 0
+            self._writes = 0
+            excess = self._conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0] - self.max_entries
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                'DELETE FROM response_cache WHERE key IN '
+                '(SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)', (excess,)
+            )
+            return excess
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache')
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Caches LLM replies by normalized message, language and prompt version.
+    Concurrent misses on the same key share a single upstream call.
+    """
+
+    def __init__(self, backend, ttl=3600):
+        self.backend = backend
+        self.ttl = ttl
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace, message, language=None, prompt_version='', context=''):
+        """context identifies any per-user prompt context (e.g. a patient snapshot digest)."""
+        parts = [namespace, prompt_version, language or '', normalize(message)]
+        if context:
+            parts.append(context)
+        raw = '\x1f'.join(parts)
+        return f"{namespace}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _count(key, result):
+        LOOKUPS.inc(namespace=key.split(':', 1)[0], result=result)
+
+    def get(self, key):
+        value = self.backend.get(key)
+        self._count(key, 'hit' if value is not None else 'miss')
+        return value
+
+    def set(self, key, value):
+        if value:
+            evicted = self.backend.set(key, value, self.ttl)
+            if evicted:
+                EVICTIONS.inc(evicted)
+
+    def get_or_compute(self, key, compute):
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(key, 'hit')
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            # Served by another request's upstream call
+            self._count(key, 'coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._count(key, 'miss')
+        try:
+            flight.value = compute()
+            self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+    def stream_through(self, key, make_stream):
+        """
+        Yield a cached reply as a single chunk, or relay the chunks of make_stream()
+        and cache the assembled reply once the stream completes.
+        """
+        value = self.get(key)
+        if value is not None:
+            yield value
+            return
+        parts = []
+        for chunk in make_stream():
+            parts.append(chunk)
+            yield chunk
+        self.set(key, ''.join(parts))
+
+
+def _create_backend():
+    max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    if os.getenv('RESPONSE_CACHE_BACKEND', 'memory') == 'sqlite':
+        return SQLiteBackend(os.getenv('RESPONSE_CACHE_PATH', 'response_cache.sqlite3'), max_entries)
+    return MemoryBackend(max_entries)
+
+
+response_cache = ResponseCache(_create_backend(), ttl=int(os.getenv('RESPONSE_CACHE_TTL', '3600')))
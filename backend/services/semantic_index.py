@@ -0,0 +1,364 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from data.drug_names import drug_names
+from services.embeddings import create_embedder
+from services.faq_index import faq_repository, normalize
+from services.metrics import counter, gauge, histogram
+from services.prompts import prompts
+
+INDEX_FORMAT = 1
+# Below this many vectors one flat list is faster than probing clusters
+IVF_MIN_ENTRIES = 4096
+SEARCH_BLOCK_ROWS = 16384
+
+LOOKUPS = counter('semantic_lookups_total', 'Semantic index lookups by result', ['result'])
+SEARCH_SECONDS = histogram(
+    'semantic_search_seconds', 'Time to embed a question and search the semantic index',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+INDEXED = gauge('semantic_index_entries', 'Questions in the semantic index, including ones not yet rebuilt into it')
+LEARNED = counter('semantic_learned_total', 'LLM answers added to the semantic index')
+
+SemanticMatch = namedtuple('SemanticMatch', ['entry', 'score'])
+
+_NUMBER_RE = re.compile(r'\d+')
+# Latin names must be whole words; Chinese is written without spaces
+_DRUG_WORD_RE = re.compile(r'(?<!\w)(?:' + '|'.join(sorted((re.escape(n) for n in drug_names if n.isascii()), key=len, reverse=True)) + r')(?!\w)')
+_DRUG_CJK_RE = re.compile('|'.join(sorted((re.escape(n) for n in drug_names if not n.isascii()), key=len, reverse=True)))
+
+
+def key_terms(text):
+    """Numbers and drug names in a question. An answer is only reused for a question with the same ones."""
+    normalized = normalize(text)
+    # normalize() splits Chinese into single characters, so drug names are looked up in the raw text
+    return frozenset(_NUMBER_RE.findall(normalized) + _DRUG_WORD_RE.findall(normalized) + _DRUG_CJK_RE.findall(text or ''))
+
+
+def quantize(vectors):
+    """Symmetric int8 quantization with one float32 scale per row: vectors ~= codes * scales[:, None]."""
+    peak = np.abs(vectors).max(axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(peak > 0, peak / 127, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def _nearest(vectors, centroids):
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        assign[start:start + SEARCH_BLOCK_ROWS] = np.argmax(vectors[start:start + SEARCH_BLOCK_ROWS] @ centroids.T, axis=1)
+    return assign
+
+
+def spherical_kmeans(vectors, k, iterations=10, sample_per_list=64, seed=0):
+    """Unit-length centroids of k clusters by cosine similarity, trained on a sample."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), k * sample_per_list), replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        # Clusters that lost every point keep their previous centroid
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+class _EntryFile:
+    """Read-only sequence over a JSON lines file, decoding a line only when it is accessed."""
+
+    def __init__(self, path, offsets):
+        self._offsets = offsets
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return json.loads(self._map[self._offsets[i]:self._offsets[i + 1]])
+
+
+class QuantizedIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors, stored as int8 codes.
+
+    Vectors are grouped into clusters around k-means centroids (an inverted file) and
+    stored cluster by cluster, so a search scores the centroids, then scans only the
+    nprobe closest clusters. Small indexes use a single cluster, i.e. an exact scan.
+    Saved indexes are opened with memory mapping: codes and entries stay on disk and in
+    the page cache, shared by every worker process on the host.
+    """
+
+    def __init__(self, centroids, offsets, codes, scales, entries):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.codes = codes
+        self.scales = scales
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, vectors, entries, lists=None, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if lists is None:
+            lists = int(np.sqrt(len(vectors))) if len(vectors) >= IVF_MIN_ENTRIES else 1
+        if lists > 1:
+            centroids = spherical_kmeans(vectors, lists, seed=seed)
+            assign = _nearest(vectors, centroids)
+        else:
+            centroids = np.zeros((1, vectors.shape[1]), dtype=np.float32)
+            assign = np.zeros(len(vectors), dtype=np.int64)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))]).astype(np.int64)
+        codes, scales = quantize(vectors[order])
+        return cls(centroids, offsets, codes, scales, [entries[i] for i in order])
+
+    def search(self, query, k=1, nprobe=8):
+        """The k best (entry, score) pairs by approximate cosine similarity, best first."""
+        if not len(self):
+            return []
+        lists = np.argsort(self.centroids @ query)[::-1][:nprobe] if len(self.centroids) > 1 else [0]
+        best_rows, best_scores = [], []
+        for cluster in lists:
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            for block in range(start, end, SEARCH_BLOCK_ROWS):
+                stop = min(end, block + SEARCH_BLOCK_ROWS)
+                scores = (self.codes[block:stop] @ query) * self.scales[block:stop]
+                top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+                best_rows.extend(top + block)
+                best_scores.extend(scores[top])
+        ranked = np.argsort(best_scores)[::-1][:k]
+        return [SemanticMatch(self.entries[best_rows[i]], float(best_scores[i])) for i in ranked]
+
+    def save(self, path, meta):
+        """Write the index to the directory `path`, replacing any previous index there."""
+        staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(staging)
+        np.save(os.path.join(staging, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(staging, 'offsets.npy'), self.offsets)
+        np.save(os.path.join(staging, 'codes.npy'), np.ascontiguousarray(self.codes))
+        np.save(os.path.join(staging, 'scales.npy'), self.scales)
+        entry_offsets = [0]
+        with open(os.path.join(staging, 'entries.jsonl'), 'wb') as f:
+            for i in range(len(self.entries)):
+                line = json.dumps(self.entries[i], ensure_ascii=False).encode('utf-8') + b'\n'
+                f.write(line)
+                entry_offsets.append(entry_offsets[-1] + len(line))
+        np.save(os.path.join(staging, 'entry_offsets.npy'), np.array(entry_offsets, dtype=np.int64))
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, format=INDEX_FORMAT, entries=len(self)), f)
+        # Readers that already mapped the old files keep them open after the swap
+        retired = f"{path}.old-{os.getpid()}-{threading.get_ident()}"
+        if os.path.exists(path):
+            os.rename(path, retired)
+        os.rename(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index memory-mapped. Returns (index, meta)."""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Unsupported semantic index format {meta.get('format')}")
+
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode='r')
+
+        entries = _EntryFile(os.path.join(path, 'entries.jsonl'), np.load(os.path.join(path, 'entry_offsets.npy')))
+        index = cls(np.load(os.path.join(path, 'centroids.npy')), np.load(os.path.join(path, 'offsets.npy')),
+                    array('codes.npy'), array('scales.npy'), entries)
+        return index, meta
+
+
+def _faq_digest(entries):
+    raw = json.dumps([[e.get('q'), e.get('a')] for e in entries], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class SemanticMatcher:
+    """
+    Answers a question from its nearest neighbour among the FAQ entries and previously
+    answered questions, when the cosine similarity is at least `threshold` and both
+    questions mention the same numbers and drug names (see key_terms).
+
+    Learning LLM answers is opt-in and needs an embedder that compares meaning
+    (embedder.semantic); with the hashing embedder only FAQ entries are matched. The index
+    is rebuilt from the FAQ and the answer log when the FAQ changes, and in the background
+    every rebuild_every learned answers; answers learned since the last build are searched
+    exactly from memory. Learned answers expire after answer_ttl seconds and when the
+    assistant prompt version changes.
+    """
+
+    def __init__(self, path, answer_log, threshold=0.9, nprobe=8, enabled=True, learn=False,
+                 rebuild_every=500, answer_ttl=30 * 24 * 3600, embedder=None):
+        self.path = path
+        self.answer_log = answer_log
+        self.threshold = threshold
+        self.nprobe = nprobe
+        self.enabled = enabled
+        self.learn_enabled = learn
+        self.rebuild_every = rebuild_every
+        self.answer_ttl = answer_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'learned': 0, 'rebuilds': 0}
+        self._embedder = embedder
+        self._index = None
+        self._faq_index = None
+        self._pending = []
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = create_embedder()
+        return self._embedder
+
+    @property
+    def learning(self):
+        return self.learn_enabled and self.embedder.semantic
+
+    def index(self):
+        faq = faq_repository.index()
+        if self._index is None or self._faq_index is not faq:
+            with self._lock:
+                if self._index is None or self._faq_index is not faq:
+                    self._index = self._load_or_build(faq.entries)
+                    self._faq_index = faq
+                    self._pending = []
+                    INDEXED.set(len(self._index))
+        return self._index
+
+    def _load_or_build(self, faq_entries):
+        if os.path.exists(os.path.join(self.path, 'meta.json')):
+            try:
+                index, meta = QuantizedIndex.load(self.path)
+                if (meta.get('embedder') == self.embedder.name and meta.get('faq') == _faq_digest(faq_entries)
+                        and meta.get('learned', False) == self.learning):
+                    return index
+            except Exception as e:
+                print(f"Error loading semantic index from {self.path}: {str(e)}")
+        return self.build(faq_entries)
+
+    def _answered(self):
+        """Current, deduplicated entries of the answer log (the newest answer per question wins)."""
+        if not self.learning or not self.answer_log or not os.path.exists(self.answer_log):
+            return []
+        prompt_key = prompts.template('assistant').key
+        expires = time.time() - self.answer_ttl
+        latest = {}
+        with open(self.answer_log, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('prompt') == prompt_key and entry.get('at', 0) >= expires:
+                    latest[normalize(entry['q'])] = entry
+        return list(latest.values())
+
+    def build(self, faq_entries=None, save=True):
+        """Embed the FAQ and the answer log into a new index, saved to `path` unless save=False."""
+        faq_entries = faq_repository.index().entries if faq_entries is None else faq_entries
+        entries = [dict(entry, source='faq') for entry in faq_entries] + self._answered()
+        vectors = self.embedder.encode([entry['q'] for entry in entries]) if entries else np.zeros((0, self.embedder.dim), np.float32)
+        index = QuantizedIndex.build(vectors, entries)
+        if save and self.path:
+            try:
+                index.save(self.path, {'embedder': self.embedder.name, 'faq': _faq_digest(faq_entries),
+                                       'learned': self.learning})
+                index, _ = QuantizedIndex.load(self.path)
+            except OSError as e:
+                # Serve the in-memory index; the next start builds again
+                print(f"Error saving semantic index to {self.path}: {str(e)}")
+        self.stats['rebuilds'] += 1
+        return index
+
+    def match(self, question, language=None):
+        """
+        SemanticMatch for the closest known question if it is similar enough, else None.
+        A learned answer is only used for the reply language it was written for.
+        """
+        if not self.enabled or not (question or '').strip():
+            return None
+        started = time.perf_counter()
+        index = self.index()
+        query = self.embedder.encode([question])[0]
+        found = index.search(query, k=1, nprobe=self.nprobe)
+        best = found[0] if found else None
+        pending = self._pending
+        if pending:
+            scores = np.stack([vector for vector, _ in pending]) @ query
+            i = int(np.argmax(scores))
+            if best is None or scores[i] > best.score:
+                best = SemanticMatch(pending[i][1], float(scores[i]))
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        if (best is not None and best.score >= self.threshold and best.entry.get('language') in (None, language)
+                and key_terms(best.entry['q']) == key_terms(question)):
+            self.stats['hits'] += 1
+            LOOKUPS.inc(result='hit')
+            return best
+        self.stats['misses'] += 1
+        LOOKUPS.inc(result='miss')
+        return None
+
+    def learn(self, question, answer, language=None):
+        """Remember an LLM answer to a question; only for replies that don't depend on the patient."""
+        if not (self.enabled and self.learning and answer and (question or '').strip()):
+            return
+        entry = {'q': question, 'a': answer, 'source': 'answered', 'language': language,
+                 'prompt': prompts.template('assistant').key, 'at': time.time()}
+        vector = self.embedder.encode([question])[0]
+        if self.answer_log:
+            with self._log_lock, open(self.answer_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        with self._lock:
+            # Copy on write so match() can read the list without locking
+            self._pending = self._pending + [(vector, entry)]
+            start_rebuild = len(self._pending) >= self.rebuild_every and not self._rebuilding
+            if start_rebuild:
+                self._rebuilding = True
+        self.stats['learned'] += 1
+        LEARNED.inc()
+        INDEXED.inc()
+        if start_rebuild:
+            threading.Thread(target=self._rebuild, name='semantic-index-rebuild', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with self._lock:
+                included = len(self._pending)
+            index = self.build()
+            with self._lock:
+                self._index = index
+                self._pending = self._pending[included:]
+                INDEXED.set(len(index) + len(self._pending))
+        except Exception as e:
+            print(f"Error rebuilding semantic index: {str(e)}")
+        finally:
+            self._rebuilding = False
+
+
+semantic_matcher = SemanticMatcher(
+    os.getenv('SEMANTIC_INDEX_DIR', 'semantic_index'),
+    os.getenv('SEMANTIC_ANSWER_LOG', 'semantic_answers.jsonl'),
+    threshold=float(os.getenv('SEMANTIC_MATCH_THRESHOLD', '0.9')),
+    nprobe=int(os.getenv('SEMANTIC_NPROBE', '8')),
+    enabled=os.getenv('SEMANTIC_MATCHING', '1').lower() not in ('0', 'false', 'no'),
+    learn=os.getenv('SEMANTIC_LEARN_ANSWERS', '0').lower() in ('1', 'true', 'yes'),
+)
@@ -0,0 +1,104 @@
+import json
+import os
+import uuid
+from collections import defaultdict
+
+from extensions import socketio
+from services.metrics import counter
+
+PUBLISHED = counter('state_sync_messages_published_total', 'Cache change messages sent to the other processes', ['kind'])
+RECEIVED = counter('state_sync_messages_received_total', 'Cache change messages applied from other processes', ['kind'])
+
+RECONNECT_SECONDS = 1.0
+
+
+class StateBus:
+    """
+    Tells the other backend processes about writes that their in-memory state depends on,
+    over the Redis behind SOCKETIO_MESSAGE_QUEUE (on a channel of its own).
+
+    Writers update their own process directly and then publish(); every other process runs
+    the handlers subscribed for that kind of message. Without a message queue there is a
+    single process and nothing to tell. Messages sent while a process is disconnected are
+    lost, so after a reconnect the on_reconnect handlers resynchronize from the database.
+    """
+
+    def __init__(self, url=None, channel='doccare-state'):
+        self.url = url
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._handlers = defaultdict(list)
+        self._reconnect_handlers = []
+        self._client = None
+        self._started = False
+        if url and not url.startswith(('redis://', 'rediss://', 'unix://')):
+            print(f"Error: cross-process cache sync needs a Redis message queue, not {url}; caches stay per process")
+            self.url = None
+
+    def subscribe(self, kind, handler):
+        """Call handler(message) for every `kind` message published by another process."""
+        self._handlers[kind].append(handler)
+
+    def on_reconnect(self, handler):
+        """Call handler() after the listener reconnects, since changes may have been missed meanwhile."""
+        self._reconnect_handlers.append(handler)
+
+    def publish(self, kind, **payload):
+        if not self.url:
+            return
+        try:
+            if self._client is None:
+                import redis
+                self._client = redis.Redis.from_url(self.url)
+            self._client.publish(self.channel, json.dumps(dict(payload, kind=kind, origin=self.origin)))
+            PUBLISHED.inc(kind=kind)
+        except Exception as e:
+            print(f"Error publishing {kind} change: {str(e)}")
+
+    def start(self):
+        """Listen for the other processes' messages in a background task. Call once socketio is initialized."""
+        if not self.url or self._started:
+            return
+        self._started = True
+        socketio.start_background_task(self._listen)
+
+    def _listen(self):
+        import redis
+        connected_before = False
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(self.url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if connected_before:
+                    self._resync()
+                connected_before = True
+                for raw in pubsub.listen():
+                    self._dispatch(raw['data'])
+            except Exception as e:
+                print(f"Error listening for cache changes: {str(e)}")
+            socketio.sleep(RECONNECT_SECONDS)
+
+    def _resync(self):
+        for handler in self._reconnect_handlers:
+            try:
+                handler()
+            except Exception as e:
+                print(f"Error resynchronizing after reconnect: {str(e)}")
+
+    def _dispatch(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get('origin') == self.origin:
+            return
+        for handler in self._handlers.get(message.get('kind'), ()):
+            try:
+                handler(message)
+                RECEIVED.inc(kind=message['kind'])
+            except Exception as e:
+                print(f"Error applying {message['kind']} change: {str(e)}")
+
+
+state_bus = StateBus(os.getenv('SOCKETIO_MESSAGE_QUEUE') or None,
+                     f"{os.getenv('SOCKETIO_CHANNEL', 'flask-socketio')}-state")
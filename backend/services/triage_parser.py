@@ -0,0 +1,189 @@
+import json
+import re
+
+# Section headers from the triage prompt, mapped to the response fields they fill
+SECTIONS = {
+    'potential conditions': 'possibleConditions',
+    'red flags': 'redFlags',
+    'additional notes for doctor': 'notes',
+    'urgency score': 'urgencyLevel',
+}
+
+DEFAULT_URGENCY = 5
+NO_NOTES = "No clinical summary available. Please obtain more information from the patient."
+NOTES_UNAVAILABLE = "Clinical summary unavailable in appropriate format."
+NO_CONDITIONS = "Insufficient information to determine conditions"
+
+# Any "Capitalized Header:" line ends the current section, like the old extraction regex
+_HEADER_RE = re.compile(r"^\s*(?:#+\s*)?(?:\*\*)?([A-Z][a-zA-Z ]+?)(?:\*\*)?\s*:(?:\*\*)?\s*(.*)$")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_NUMBER_RE = re.compile(r"(\d+)")
+_URGENCY_FALLBACK_RE = re.compile(r"(?:urgency|priority|severity).*?(\d+)[/\s]*(?:10)?", re.IGNORECASE)
+_FIRST_PERSON_RE = re.compile(
+    r"I'm sorry|I recommend|I'm here to support|Take care|your health and well-being|feel free to ask",
+    re.IGNORECASE
+)
+_NONE_RE = re.compile(r"^\s*(?:none|no red flags|nil)\b", re.IGNORECASE)
+
+
+def _clamp_urgency(value):
+    return max(1, min(int(value), 10))
+
+
+def _bullet_items(lines):
+    """Group lines into items, starting a new item at each bullet or number."""
+    items = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if _BULLET_RE.match(line) or not items:
+            items.append(_BULLET_RE.sub('', line, count=1).strip())
+        else:
+            items[-1] = f"{items[-1]} {line.strip()}"
+    return [item for item in items if item]
+
+
+def _conditions(lines):
+    items = _bullet_items(lines)
+    if not items:
+        return [{"condition": NO_CONDITIONS, "confidence": 1.0}]
+    return [{"condition": item, "confidence": 1.0} for item in items]
+
+
+def _red_flags(lines):
+    return [item for item in _bullet_items(lines) if not _NONE_RE.match(item)]
+
+
+def _notes(lines):
+    if not ''.join(lines).strip():
+        return NO_NOTES
+    # Drop first-person chatter that doesn't belong in a note for the doctor
+    notes = '\n'.join(line for line in lines if not _FIRST_PERSON_RE.search(line)).strip()
+    return notes or NOTES_UNAVAILABLE
+
+
+def _urgency(lines):
+    match = _NUMBER_RE.search(' '.join(lines))
+    return _clamp_urgency(match.group(1)) if match else None
+
+
+_FINALIZERS = {
+    'possibleConditions': _conditions,
+    'redFlags': _red_flags,
+    'notes': _notes,
+    'urgencyLevel': _urgency,
+}
+
+
+class TriageParser:
+    """
+    Incremental parser for the triage completion format.
+
+    feed() takes text deltas as they stream in and returns (field, value) events
+    for every section that has closed, so red flags or the urgency score can be
+    forwarded before the model finishes. close() flushes the last section and
+    result() returns the full diagnosis payload.
+    """
+
+    def __init__(self):
+        self._pending = ''
+        self._text = []
+        self._field = None
+        self._lines = []
+        self.fields = {}
+
+    def feed(self, chunk):
+        self._text.append(chunk)
+        events = []
+        if '\n' in chunk:
+            lines = (self._pending + chunk).split('\n')
+            self._pending = lines.pop()
+            for line in lines:
+                events.extend(self._line(line))
+        else:
+            self._pending += chunk
+        if self._field is not None and _HEADER_RE.match(self._pending):
+            # The next header has started, so the current section is complete
+            events.extend(self._finish_section())
+        return events
+
+    def close(self):
+        events = []
+        if self._pending:
+            events.extend(self._line(self._pending))
+            self._pending = ''
+        events.extend(self._finish_section())
+        for field, finalize in _FINALIZERS.items():
+            if field not in self.fields:
+                value = finalize([])
+                if field == 'urgencyLevel':
+                    value = self._fallback_urgency()
+                self.fields[field] = value
+                events.append((field, value))
+        return events
+
+    def result(self):
+        return {
+            "translatedSymptoms": None,
+            "possibleConditions": self.fields.get('possibleConditions'),
+            "redFlags": self.fields.get('redFlags', []),
+            "urgencyLevel": self.fields.get('urgencyLevel', DEFAULT_URGENCY),
+            "notes": self.fields.get('notes'),
+        }
+
+    def _line(self, line):
+        header = _HEADER_RE.match(line)
+        if not header:
+            if self._field is not None:
+                self._lines.append(line)
+            return []
+        events = self._finish_section()
+        field = SECTIONS.get(header.group(1).strip().lower())
+        # Only the first occurrence of a section counts, as with the old regex extraction
+        self._field = field if field not in self.fields else None
+        self._lines = [header.group(2)] if header.group(2) else []
+        if self._field == 'urgencyLevel' and self._lines:
+            # The score sits on the header line itself, so it can go out right away
+            events.extend(self._finish_section())
+        return events
+
+    def _finish_section(self):
+        field, lines = self._field, self._lines
+        self._field, self._lines = None, []
+        if field is None:
+            return []
+        value = _FINALIZERS[field](lines)
+        if value is None:
+            return []
+        self.fields[field] = value
+        return [(field, value)]
+
+    def _fallback_urgency(self):
+        match = _URGENCY_FALLBACK_RE.search(''.join(self._text))
+        return _clamp_urgency(match.group(1)) if match else DEFAULT_URGENCY
+
+
+def parse_triage(text):
+    """Parse a complete triage completion into the diagnosis payload."""
+    parser = TriageParser()
+    parser.feed(text)
+    parser.close()
+    return parser.result()
+
+
+def parse_triage_json(text):
+    """Build the diagnosis payload from a structured (JSON mode) triage completion."""
+    data = json.loads(text)
+    conditions = [str(c).strip() for c in data.get('possibleConditions') or [] if str(c).strip()]
+    red_flags = [str(f).strip() for f in data.get('redFlags') or [] if str(f).strip() and not _NONE_RE.match(str(f))]
+    try:
+        urgency = _clamp_urgency(data.get('urgencyScore', DEFAULT_URGENCY))
+    except (TypeError, ValueError):
+        urgency = DEFAULT_URGENCY
+    return {
+        "translatedSymptoms": None,
+        "possibleConditions": [{"condition": c, "confidence": 1.0} for c in conditions] or _conditions([]),
+        "redFlags": red_flags,
+        "urgencyLevel": urgency,
+        "notes": _notes(str(data.get('notes') or '').split('\n')),
+    }
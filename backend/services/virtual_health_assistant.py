@@ -1,51 +1,29 @@
-import os
-from dotenv import load_dotenv
-import openai
+from services.llm import gateway
+from services.patient_context import patient_context
+from services.prompts import prompts
+from services.response_cache import response_cache
 
-# Load environment variables from .env file
-load_dotenv()
+def _assistant_request(user_message, language_hint, user_id):
+    patient = patient_context.get(user_id)
+    prompt, messages = prompts.messages('assistant', user_message, language_hint, context=patient and patient.text)
+    return messages, response_cache.make_key('assistant', user_message, prompt.language, prompt.key, patient and patient.digest)
 
-api_key = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI(api_key=api_key)
-
-def ask_virtual_health_assistant(user_message, language_hint=None):
+def ask_virtual_health_assistant(user_message, language_hint=None, user_id=None):
     """
     Calls OpenAI API with a professional virtual health assistant prompt.
+    Replies are served from the response cache when the same normalized message was answered before.
     :param user_message: The user's message (symptoms, question, etc.)
     :param language_hint: Optional language code (e.g., 'en', 'zh') to reinforce reply language.
+    :param user_id: Optional user whose conditions and medications (see patient_context) personalize the reply.
     :return: Assistant's reply as a string.
     """
-    system_prompt = (
-        "Limit your response to 4 sentences or less. Do not provide long explanations. "
-        "Respond in a polite and supportive way. "
-        "If the user's language is Malay, always reply in Bahasa Malaysia (Malaysian Malay), not Indonesian. "
-        "You are MY-Care, a professional, friendly, and highly knowledgeable virtual health assistant. "
-        "Your job is to help users understand their symptoms, answer general health questions, and provide guidance on when to seek medical care. "
-        "You are not a doctor and do not provide diagnoses or treatment plans. "
-        "Always reply in the same language as the user's input, no matter what language the user uses. "
-        "Always encourage users to consult a qualified healthcare professional for any urgent or serious concerns.\n"
-        "Instructions:\n"
-        "- Answer questions clearly, briefly, and in a supportive, conversational tone.\n"
-        "- Keep your replies concise and avoid long-winded explanations.\n"
-        "- If a user describes symptoms, provide general information about possible causes, but do NOT make a diagnosis.\n"
-        "- If symptoms are severe, worsening, or involve red flags (e.g., chest pain, difficulty breathing, severe headache, confusion, persistent vomiting, bleeding, loss of consciousness), advise the user to seek immediate medical attention.\n"
-        "- If the user asks about medications, provide general information and remind them to consult a doctor or pharmacist before starting or stopping any medication.\n"
-        "- If the user asks for a diagnosis or treatment, politely explain that you cannot provide a diagnosis or prescribe treatment, and recommend seeing a healthcare professional.\n"
-        "- If the user asks about mental health, respond with empathy and encourage seeking support from professionals or trusted individuals.\n"
-        "- If you do not know the answer, say so honestly and suggest consulting a healthcare provider.\n"
-        "Format:\n"
-        "- Use short paragraphs and bullet points if helpful.\n"
-        "- Be polite, professional, and supportive at all times.\n"
-        "- Never provide false reassurance or medical advice beyond your scope.\n"
-        "If the user's message is not health-related, politely redirect them to health topics."
-    )
-    if language_hint:
-        system_prompt = f"Reply in {language_hint}. " + system_prompt
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
-    )
-    return response.choices[0].message.content 
\ No newline at end of file
+    messages, key = _assistant_request(user_message, language_hint, user_id)
+    return response_cache.get_or_compute(key, lambda: gateway.complete(messages))
+
+def stream_virtual_health_assistant(user_message, language_hint=None, user_id=None):
+    """
+    Same as ask_virtual_health_assistant, but yields the reply in chunks as the model generates it.
+    A cached reply is yielded as a single chunk. The patient context is looked up on call, not on first iteration.
+    """
+    messages, key = _assistant_request(user_message, language_hint, user_id)
+    return response_cache.stream_through(key, lambda: gateway.stream(messages))
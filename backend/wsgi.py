@@ -0,0 +1,46 @@
+"""
+Production entry point for the API and the Socket.IO server.
+
+Runs on gevent so one process holds thousands of idle chat connections, each a
+greenlet instead of a thread. The standard library must be patched before
+anything else is imported, which is why this is a separate module:
+
+    gunicorn --worker-class gevent -w 1 --bind 0.0.0.0:5000 wsgi:app
+
+Socket.IO needs sticky sessions, so scale out by running one such process per
+port behind a load balancer with session affinity (e.g. nginx ip_hash) and
+point them all at the same message queue so rooms span processes:
+
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0
+
+Set REMINDER_DISPATCHER=1 on exactly one process to run the reminder dispatcher.
+The processes tell each other about reminder and patient record writes over the
+same Redis (services/state_sync.py), so the dispatcher's schedule and every
+process's patient snapshots follow writes served anywhere.
+"""
+import os
+
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+if os.environ['SOCKETIO_ASYNC_MODE'] == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    # psycopg2 is a C extension; without this every query blocks the whole process
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+from app import create_app  # noqa: E402
+from extensions import socketio  # noqa: E402
+
+app = create_app()
+
+# Every process claims jobs from the shared queue, so jobs persisted before a restart run without
+# waiting for a new submission; DIAGNOSIS_WORKERS=0 keeps a process out of the pool
+from services.jobs import diagnosis_workers  # noqa: E402
+diagnosis_workers.ensure_started(app)
+
+if os.getenv('REMINDER_DISPATCHER', '').lower() in ('1', 'true', 'yes'):
+    from services.reminder_dispatch import start_dispatcher
+    start_dispatcher(app)
+
+if __name__ == '__main__':
+    socketio.run(app, host=os.getenv('HOST', '127.0.0.1'), port=int(os.getenv('PORT', '5000')))